@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.endpoints import login, users, academic
+from app.api.endpoints import login, users, academic, health, admin
 
 api_router = APIRouter()
 api_router.include_router(login.router, prefix="/login", tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(academic.router, prefix="/academic", tags=["academic"])
+api_router.include_router(health.router, prefix="/health", tags=["health"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
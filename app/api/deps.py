@@ -3,19 +3,22 @@ from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
-from sqlmodel import select
 from app.core import security
-from app.models.user import UserRead, User
-from app.schemas.token import TokenPayload
-from app.db.session import SessionDep
-from typing import Annotated
+from app.core.config import settings
+from app.models.user import UserRead, Role
+from app.schemas.token import TokenPayload, Principal
+from app.db.session import SessionDep, read_session
+from typing import Annotated, AsyncIterator, Optional
 from app.core.exceptions import InvalidCredentialsError
 from app.services.user_service import user_service
+import time
 import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metrics import AUTH_DURATION
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/api/v1/access-token")
 
-async def get_current_user(session: SessionDep, token: str = Depends(reusable_oauth2)) -> UserRead:
+def decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, security.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -23,15 +26,80 @@ async def get_current_user(session: SessionDep, token: str = Depends(reusable_oa
         token_data = TokenPayload(**payload)
         if not token_data.sub:
             raise InvalidCredentialsError()
+        uuid.UUID(token_data.sub)
     except (InvalidTokenError, ValidationError, ValueError):
         raise InvalidCredentialsError()
-    
+    return token_data
+
+async def get_token_data(token: str = Depends(reusable_oauth2)) -> Optional[TokenPayload]:
+    """
+    The request's token, decoded once and shared by the read session and the auth dependencies.
+    None when it is invalid; the auth dependencies reject it.
+    """
+    try:
+        return decode_token(token)
+    except InvalidCredentialsError:
+        return None
+
+async def get_read_session(token_data: Optional[TokenPayload] = Depends(get_token_data)) -> AsyncIterator[AsyncSession]:
+    async with read_session(uuid.UUID(token_data.sub) if token_data else None) as session:
+        yield session
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+async def get_current_user(session: ReadSessionDep, token_data: Optional[TokenPayload] = Depends(get_token_data)) -> UserRead:
+    if token_data is None:
+        raise InvalidCredentialsError()
+
     user = await user_service.get_by_id(session, uuid.UUID(token_data.sub))
-    
+
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    if token_data.ver is not None and token_data.ver != user.token_version:
+        raise InvalidCredentialsError()
     return user
 
-GetCurrentUser = Annotated[UserRead, Depends(get_current_user)]
\ No newline at end of file
+async def get_current_principal(session: ReadSessionDep, token_data: Optional[TokenPayload] = Depends(get_token_data)) -> Principal:
+    """
+    Authenticate from the token claims alone; only the per-user token version is checked.
+    Falls back to a full user lookup for tokens issued without claims.
+    """
+    started = time.perf_counter()
+    outcome = "rejected"
+    try:
+        principal = await _resolve_principal(session, token_data)
+        outcome = "success"
+        return principal
+    finally:
+        AUTH_DURATION.observe(time.perf_counter() - started, "principal", outcome)
+
+async def _resolve_principal(session: AsyncSession, token_data: Optional[TokenPayload]) -> Principal:
+    if token_data is None:
+        raise InvalidCredentialsError()
+
+    if not settings.AUTH_STATELESS or token_data.ver is None or token_data.role is None:
+        user = await get_current_user(session, token_data)
+        return Principal(id=user.id, role=user.role, is_active=user.is_active, token_version=user.token_version)
+
+    if not token_data.active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    user_id = uuid.UUID(token_data.sub)
+    version = await user_service.get_token_version(session, user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if version != token_data.ver:
+        raise InvalidCredentialsError()
+
+    return Principal(id=user_id, role=token_data.role, is_active=True, token_version=version)
+
+async def get_current_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    return principal
+
+GetCurrentUser = Annotated[UserRead, Depends(get_current_user)]
+GetCurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+GetCurrentAdmin = Annotated[Principal, Depends(get_current_admin)]
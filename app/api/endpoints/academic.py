@@ -1,28 +1,68 @@
-from typing import Any, List
-from fastapi import APIRouter
-from app.api.deps import SessionDep, GetCurrentUser
+from typing import Any, List, Optional
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api.deps import ReadSessionDep, GetCurrentPrincipal
+from app.api.responses import json_body_response
+from app.core.config import settings
 from app.services.academic_service import academic_service
-from app.schemas.academic import SubjectRead, GradeRead, ScheduleRead
+from app.schemas.academic import SubjectRead, GradeRead, ScheduleRead, AcademicOverview, GradeSummary, GradePage
 
 router = APIRouter()
 
 @router.get("/subjects", response_model=List[SubjectRead])
-async def read_my_subjects(session: SessionDep, current_user: GetCurrentUser) -> Any:
+async def read_my_subjects(request: Request, session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
     """
     Retrieve subjects for the current user (Enrolled).
     """
-    return await academic_service.get_student_subjects(session, current_user.id)
+    return json_body_response(await academic_service.get_student_subjects(session, current_user.id), request)
 
 @router.get("/grades", response_model=List[GradeRead])
-async def read_my_grades(session: SessionDep, current_user: GetCurrentUser) -> Any:
+async def read_my_grades(request: Request, session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
     """
     Retrieve my grades.
     """
-    return await academic_service.get_student_grades(session, current_user.id)
+    return json_body_response(await academic_service.get_student_grades(session, current_user.id), request)
+
+@router.get("/grades/history", response_model=GradePage)
+async def read_my_grade_history(
+    request: Request,
+    session: ReadSessionDep,
+    current_user: GetCurrentPrincipal,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=settings.GRADE_PAGE_MAX_LIMIT),
+) -> Any:
+    """
+    Retrieve my grades one page at a time; pass next_cursor back to get the following page.
+    """
+    return json_body_response(await academic_service.get_student_grade_page(session, current_user.id, cursor, limit), request)
+
+@router.get("/grades/history/stream")
+async def stream_my_grade_history(session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
+    """
+    Stream my whole grade history as NDJSON, one grade per line.
+    """
+    return StreamingResponse(
+        academic_service.stream_student_grades(session, current_user.id),
+        media_type="application/x-ndjson",
+    )
 
 @router.get("/schedule", response_model=List[ScheduleRead])
-async def read_my_schedule(session: SessionDep, current_user: GetCurrentUser) -> Any:
+async def read_my_schedule(request: Request, session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
     """
     Retrieve my weekly schedule.
     """
-    return await academic_service.get_student_schedule(session, current_user.id)
+    return json_body_response(await academic_service.get_student_schedule(session, current_user.id), request)
+
+@router.get("/overview", response_model=AcademicOverview)
+async def read_my_overview(request: Request, session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
+    """
+    Retrieve my subjects, grades and schedule in a single request (Dashboard).
+    """
+    return json_body_response(await academic_service.get_student_overview(session, current_user.id), request)
+
+@router.get("/summary", response_model=GradeSummary)
+async def read_my_summary(request: Request, session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
+    """
+    Retrieve my weighted average per subject and my overall GPA.
+    """
+    return json_body_response(await academic_service.get_student_summary(session, current_user.id), request)
@@ -0,0 +1,17 @@
+from typing import Any
+from fastapi import APIRouter, HTTPException, Request
+from app.api.deps import SessionDep, GetCurrentAdmin
+from app.schemas.academic import GradeImportResult
+from app.services.grade_import_service import grade_import_service, FORMATS
+
+router = APIRouter()
+
+@router.post("/grades/import", response_model=GradeImportResult)
+async def import_grades(request: Request, session: SessionDep, current_user: GetCurrentAdmin) -> Any:
+    """
+    Bulk load grades from a CSV or NDJSON upload (Admin).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in FORMATS:
+        raise HTTPException(status_code=415, detail=f"Upload must be one of: {', '.join(FORMATS)}")
+    return await grade_import_service.import_grades(session, request.stream(), content_type)
@@ -0,0 +1,20 @@
+from typing import Any
+from fastapi import APIRouter
+from app.core.cache import cache
+from app.core.hashing import hashing_pool
+from app.db.session import pool_stats, replicas
+
+router = APIRouter()
+
+@router.get("/")
+async def read_health() -> Any:
+    """
+    Service health with cache tier, hashing pool, database pool and replica statistics.
+    """
+    return {
+        "status": "ok",
+        "cache": cache.stats(),
+        "hashing": hashing_pool.stats(),
+        "db_pool": pool_stats(),
+        "db_replicas": replicas.stats(),
+    }
@@ -1,6 +1,7 @@
 from typing import Any
-from fastapi import APIRouter
-from app.api.deps import SessionDep, GetCurrentUser
+from fastapi import APIRouter, HTTPException, Request
+from app.api.deps import SessionDep, ReadSessionDep, GetCurrentUser, GetCurrentPrincipal
+from app.api.responses import json_body_response
 from app.models.user import UserCreate, UserRead, UserUpdate
 from app.services.user_service import user_service
 
@@ -15,11 +16,14 @@ async def create_user(session: SessionDep, user_in: UserCreate) -> Any:
     return user
 
 @router.get("/me", response_model=UserRead)
-async def read_user_me(current_user: GetCurrentUser) -> Any:
+async def read_user_me(request: Request, session: ReadSessionDep, current_user: GetCurrentPrincipal) -> Any:
     """
     Get current user.
     """
-    return current_user
+    profile = await user_service.get_profile(session, current_user.id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return json_body_response(profile, request)
 
 @router.patch("/me", response_model=UserRead)
 async def update_user_me(session: SessionDep, user_in: UserUpdate, current_user: GetCurrentUser) -> Any:
@@ -25,3 +25,22 @@ async def inactive_user_handler(request: Request, exc: exceptions.InactiveUserEr
         status_code=status.HTTP_400_BAD_REQUEST,
         content={"detail": "Inactive user"},
     )
+
+async def invalid_cursor_handler(request: Request, exc: exceptions.InvalidCursorError):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": "Invalid pagination cursor"},
+    )
+
+async def grade_import_handler(request: Request, exc: exceptions.GradeImportError):
+    return JSONResponse(
+        status_code=422,
+        content={"detail": "Grade import rejected, nothing was saved", "errors": exc.errors},
+    )
+
+async def hashing_pool_busy_handler(request: Request, exc: exceptions.HashingPoolBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
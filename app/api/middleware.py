@@ -0,0 +1,77 @@
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core import timing
+from app.core.config import settings
+from app.core.metrics import HTTP_REQUEST_DURATION
+
+def route_template(scope: Scope) -> str:
+    """
+    The matched route's path with parameters put back as placeholders ("/items/{item_id}"), so
+    label values stay bounded. Rebuilt from the path because nested routers don't expose the
+    full template the same way across FastAPI versions.
+    """
+    if "endpoint" not in scope:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+class MetricsMiddleware:
+    """
+    Records each HTTP request's latency under its route template. Plain ASGI, so the response is
+    streamed through untouched.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, scope["method"], route_template(scope), str(status)
+            )
+
+class ServerTimingMiddleware:
+    """
+    Collects the SQL, Redis and hashing time of each request and reports it in a Server-Timing
+    header (per-statement detail with DEBUG). Work done after the headers are sent, by a
+    streamed body, is not included. Logs a warning when a request repeats the same SELECT with
+    different parameters N_PLUS_ONE_THRESHOLD times or more.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = timing.start()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.server_timing(timings, time.perf_counter() - started, settings.DEBUG))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timing.warn_repeated_statements(timings, scope["method"], scope["path"])
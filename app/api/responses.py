@@ -0,0 +1,31 @@
+import hashlib
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+def body_etag(body: bytes) -> str:
+    """
+    Strong validator for a serialized body: the same bytes always give the same tag.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ tags match too
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def json_body_response(body: bytes, request: Optional[Request] = None) -> Response:
+    """
+    Send an already serialized JSON body as is, skipping response_model validation and encoding.
+    With the request, the body is tagged and a matching If-None-Match is answered with 304.
+    """
+    if request is None:
+        return Response(content=body, media_type="application/json")
+
+    headers = {"ETag": body_etag(body), "Cache-Control": "private, no-cache"}
+    if etag_matches(headers["ETag"], request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,36 +1,574 @@
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Union
+from collections import OrderedDict
+import asyncio
+import orjson
+import math
+import random
+import time
+import uuid
 import redis.asyncio as redis
-import json
+from app.core import timing
 from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS, Gauge, registry
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Generation counters live under this prefix, one per scope ("student:<id>", "catalog", ...)
+GENERATION_PREFIX = "gen:"
+
+_MISS = object()
+
+# Stored in place of a value for keys known to have no data; never valid JSON
+ABSENT_MARKER = b"!absent"
+
+class _Absent:
+    """
+    Sentinel returned for negatively cached keys. Falsy, so callers that only test truthiness
+    simply treat it as a miss.
+    """
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "ABSENT"
+
+ABSENT = _Absent()
+
+def _encode(value: Any, raw: bool = False) -> bytes:
+    if value is ABSENT:
+        return ABSENT_MARKER
+    return value if raw else orjson.dumps(value)
+
+def _decode(data: bytes, raw: bool = False) -> Any:
+    if data == ABSENT_MARKER:
+        return ABSENT
+    return data if raw else orjson.loads(data)
+
+def _family(key: str) -> str:
+    # "user:id:<uuid>" -> "user": bounded label values for metrics
+    return key.partition(":")[0]
+
+async def _timed(call: Awaitable) -> Any:
+    # One Redis round trip, charged to the current request's cache time
+    started = time.perf_counter()
+    try:
+        return await call
+    finally:
+        timing.record_cache(time.perf_counter() - started)
+
+def _is_empty(value: Any) -> bool:
+    return not value or value in (b"[]", b"{}")
+
+class LocalCache:
+    """
+    Bounded in-process LRU with per-entry expiry. Used as the L1 tier of CacheManager.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[Any, float, float]]" = OrderedDict()
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """
+        Return (value, stale_at) for a live entry, None otherwise.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at, stale_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, stale_at
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, stale_at: float = math.inf):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl, stale_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 class CacheManager:
     client: Optional[redis.Redis] = None
+    local = LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_TTL)
+    instance_id: str = uuid.uuid4().hex
+    _listener: Optional[asyncio.Task] = None
+    _inflight: Dict[str, asyncio.Future] = {}
+    _load_time: Dict[str, float] = {}
+
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
 
     @classmethod
     async def connect(cls):
-        cls.client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        cls.client = redis.from_url(settings.REDIS_URL)
         await cls.client.ping()
+        cls._listener = asyncio.create_task(cls._listen())
         print("✅ Redis Connected")
 
     @classmethod
     async def close(cls):
+        if cls._listener:
+            cls._listener.cancel()
+            cls._listener = None
+        cls.local.clear()
         if cls.client:
             await cls.client.close()
             print("🛑 Redis Closed")
 
     @classmethod
-    async def get(cls, key: str) -> Optional[Any]:
+    async def get(cls, key: str, raw: bool = False) -> Optional[Any]:
+        """
+        Return the cached value, or with raw=True the stored JSON bytes untouched (for keys whose
+        value is a pre-serialized response body).
+        """
         if not cls.client:
             return None
-        val = await cls.client.get(key)
+        value = cls.local.get(key, _MISS)
+        if value is not _MISS:
+            cls.l1_hits += 1
+            CACHE_LOOKUPS.inc(_family(key), "l1_hit")
+            return value
+
+        try:
+            val, pttl = await _timed(cls.client.pipeline(transaction=False).get(key).pttl(key).execute())
+        except redis.RedisError:
+            CACHE_LOOKUPS.inc(_family(key), "error")
+            raise
         if val:
-            return json.loads(val)
+            cls.l2_hits += 1
+            CACHE_LOOKUPS.inc(_family(key), "l2_hit")
+            value = _decode(val, raw)
+            cls.local.set(key, value, ttl=pttl / 1000 if pttl > 0 else None)
+            return value
+        cls.misses += 1
+        CACHE_LOOKUPS.inc(_family(key), "miss")
         return None
 
+    @classmethod
+    async def get_many(cls, keys: List[str], raw: bool = False) -> List[Optional[Any]]:
+        """
+        Read several keys with at most one Redis round trip. Returns values in key order, None for misses.
+        """
+        if not cls.client or not keys:
+            return [None] * len(keys)
+
+        values: List[Optional[Any]] = []
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            value = cls.local.get(key, _MISS)
+            if value is _MISS:
+                missing.append(i)
+                value = None
+            else:
+                cls.l1_hits += 1
+                CACHE_LOOKUPS.inc(_family(key), "l1_hit")
+            values.append(value)
+        if not missing:
+            return values
+
+        pipe = cls.client.pipeline(transaction=False)
+        pipe.mget([keys[i] for i in missing])
+        for i in missing:
+            pipe.pttl(keys[i])
+        try:
+            raw_values, *pttls = await _timed(pipe.execute())
+        except redis.RedisError:
+            for i in missing:
+                CACHE_LOOKUPS.inc(_family(keys[i]), "error")
+            raise
+
+        now = time.monotonic()
+        for i, val, pttl in zip(missing, raw_values, pttls):
+            if not val:
+                cls.misses += 1
+                CACHE_LOOKUPS.inc(_family(keys[i]), "miss")
+                continue
+            cls.l2_hits += 1
+            CACHE_LOOKUPS.inc(_family(keys[i]), "l2_hit")
+            value = _decode(val, raw)
+            remaining = pttl / 1000 if pttl > 0 else None
+            stale_at = now + remaining - settings.CACHE_STALE_TTL if remaining else math.inf
+            cls.local.set(keys[i], value, ttl=remaining, stale_at=stale_at)
+            values[i] = value
+        return values
+
+    @classmethod
+    def get_local(cls, key: str) -> Optional[Any]:
+        """
+        Read an L1-only entry: something derived per worker that isn't worth storing in Redis.
+        """
+        if not cls.client:
+            return None
+        value = cls.local.get(key)
+        CACHE_LOOKUPS.inc(_family(key), "miss" if value is None else "l1_hit")
+        return value
+
+    @classmethod
+    def set_local(cls, key: str, value: Any, ttl: Optional[int] = None):
+        if cls.client:
+            cls.local.set(key, value, ttl=ttl)
+
     @classmethod
     async def set(cls, key: str, value: Any, ttl: int = 300):
         if not cls.client:
             return
-        await cls.client.set(key, json.dumps(value), ex=ttl)
+        await _timed(cls.client.set(key, _encode(value), ex=ttl))
+        cls.local.set(key, value, ttl=ttl)
+
+    @classmethod
+    async def set_many(cls, items: Mapping[str, Any], ttl: Union[int, Mapping[str, int]] = 300, broadcast: bool = False):
+        """
+        Write several keys in one pipelined round trip. `ttl` is either shared or given per key.
+        With `broadcast`, other workers drop their L1 copies of the keys in the same round trip.
+        """
+        if not cls.client or not items:
+            return
+        pipe = cls.client.pipeline(transaction=False)
+        for key, value in items.items():
+            key_ttl = ttl[key] if isinstance(ttl, Mapping) else ttl
+            pipe.set(key, _encode(value), ex=key_ttl)
+            cls.local.set(key, value, ttl=key_ttl)
+        if broadcast:
+            pipe.publish(INVALIDATION_CHANNEL, orjson.dumps({"origin": cls.instance_id, "keys": list(items)}))
+        await _timed(pipe.execute())
+
+    @classmethod
+    async def set_absent(cls, key: str, ttl: Optional[int] = None):
+        """
+        Remember that `key` has no data; `get` returns ABSENT until it expires or is overwritten.
+        """
+        await cls.set(key, ABSENT, ttl=ttl or settings.CACHE_NEGATIVE_TTL)
+
+    @classmethod
+    async def get_or_set(cls, key: str, loader: Callable[[], Awaitable[Any]], ttl: int = 300, raw: bool = False) -> Any:
+        """
+        Read-through caching with stampede protection.
+
+        Concurrent misses on one worker share a single load, and a Redis lock elects one loader across
+        workers while the rest wait briefly for its result. Entries are kept for CACHE_STALE_TTL seconds
+        past their TTL so that, once stale (or picked for probabilistic early refresh), one request
+        recomputes them while everyone else keeps being served the stale value.
+
+        Empty and None results are cached as well, for at most CACHE_NEGATIVE_TTL seconds.
+        With raw=True the loader returns JSON bytes, which are stored and returned as they are.
+        """
+        if not cls.client:
+            return await loader()
+
+        entry = cls._local_entry(key)
+        if entry is not None:
+            value, stale_at = entry
+            if value is ABSENT:
+                value = None
+            if key in cls._inflight or not cls._should_refresh(key, stale_at):
+                return value
+            return await cls._singleflight(key, cls._refresh(key, loader, ttl, raw, value))
+
+        inflight = cls._inflight.get(key)
+        if inflight:
+            return await asyncio.shield(inflight)
+        return await cls._singleflight(key, cls._load(key, loader, ttl, raw))
+
+    @classmethod
+    def _local_entry(cls, key: str) -> Optional[tuple]:
+        entry = cls.local.get_entry(key)
+        if entry is not None:
+            cls.l1_hits += 1
+            CACHE_LOOKUPS.inc(_family(key), "l1_hit")
+        return entry
+
+    @classmethod
+    async def _remote_entry(cls, key: str, raw: bool) -> Optional[tuple]:
+        try:
+            entry = await cls._read_through(key, raw)
+        except redis.RedisError:
+            CACHE_LOOKUPS.inc(_family(key), "error")
+            raise
+        if entry is None:
+            cls.misses += 1
+            CACHE_LOOKUPS.inc(_family(key), "miss")
+        else:
+            cls.l2_hits += 1
+            CACHE_LOOKUPS.inc(_family(key), "l2_hit")
+        return entry
+
+    @classmethod
+    async def _read_through(cls, key: str, raw: bool) -> Optional[tuple]:
+        val, pttl = await _timed(cls.client.pipeline(transaction=False).get(key).pttl(key).execute())
+        if not val:
+            return None
+        value = _decode(val, raw)
+        remaining = pttl / 1000 if pttl > 0 else None
+        stale_at = time.monotonic() + remaining - settings.CACHE_STALE_TTL if remaining else math.inf
+        cls.local.set(key, value, ttl=remaining, stale_at=stale_at)
+        return value, stale_at
+
+    @classmethod
+    def _should_refresh(cls, key: str, stale_at: float) -> bool:
+        # XFetch: refresh early with a probability that grows as expiry nears and with the cost of a load
+        delta = cls._load_time.get(key.split(":", 1)[0], 0.0)
+        jitter = delta * settings.CACHE_EARLY_REFRESH_BETA * -math.log(1.0 - random.random())
+        return time.monotonic() + jitter >= stale_at
+
+    @classmethod
+    async def _singleflight(cls, key: str, work: Awaitable) -> Any:
+        # The load runs in its own task, registered before the first await, and every caller on this
+        # worker (the one that started it included) awaits it shielded: callers skip Redis, and one of
+        # them being cancelled never cancels the load under the others
+        task = asyncio.ensure_future(work)
+        cls._inflight[key] = task
+        task.add_done_callback(lambda done: cls._load_done(key, done))
+        return await asyncio.shield(task)
+
+    @classmethod
+    def _load_done(cls, key: str, task: asyncio.Future):
+        if cls._inflight.get(key) is task:
+            del cls._inflight[key]
+        # Everyone waiting may have been cancelled; consume the error so the loop doesn't log it
+        if not task.cancelled():
+            task.exception()
+
+    @classmethod
+    async def _refresh(cls, key: str, loader: Callable[[], Awaitable[Any]], ttl: int, raw: bool, stale: Any) -> Any:
+        token = await cls.acquire_lock(key)
+        if not token:
+            # Another worker is refreshing it
+            return stale
+        return await cls._fill(key, loader, ttl, token, raw)
+
+    @classmethod
+    async def _load(cls, key: str, loader: Callable[[], Awaitable[Any]], ttl: int, raw: bool) -> Any:
+        entry = await cls._remote_entry(key, raw)
+        if entry is not None:
+            value, stale_at = entry
+            if value is ABSENT:
+                value = None
+            if not cls._should_refresh(key, stale_at):
+                return value
+            return await cls._refresh(key, loader, ttl, raw, value)
+
+        token = await cls.acquire_lock(key)
+        if not token:
+            value = await cls._wait_for(key, raw)
+            if value is not _MISS:
+                return value
+        return await cls._fill(key, loader, ttl, token, raw)
+
+    @classmethod
+    async def _fill(cls, key: str, loader: Callable[[], Awaitable[Any]], ttl: int, token: Optional[str], raw: bool) -> Any:
+        try:
+            started = time.monotonic()
+            value = await loader()
+            family = key.split(":", 1)[0]
+            elapsed = time.monotonic() - started
+            cls._load_time[family] = 0.8 * cls._load_time.get(family, elapsed) + 0.2 * elapsed
+
+            await cls.store(key, value, ttl, raw)
+            return value
+        finally:
+            if token:
+                await cls.release_lock(key, token)
+
+    @classmethod
+    async def store(cls, key: str, value: Any, ttl: int, raw: bool = False):
+        await cls.store_many({key: value}, ttl, raw)
+
+    @classmethod
+    async def store_many(cls, items: Mapping[str, Any], ttl: Union[int, Mapping[str, int]], raw: bool = False):
+        """
+        Write entries the way get_or_set does: kept CACHE_STALE_TTL past their TTL, with empty and None
+        values limited to CACHE_NEGATIVE_TTL. One pipelined round trip.
+        """
+        if not cls.client or not items:
+            return
+        now = time.monotonic()
+        pipe = cls.client.pipeline(transaction=False)
+        for key, value in items.items():
+            key_ttl = ttl[key] if isinstance(ttl, Mapping) else ttl
+            stored = ABSENT if value is None else value
+            if _is_empty(value):
+                key_ttl = min(key_ttl, settings.CACHE_NEGATIVE_TTL)
+            pipe.set(key, _encode(stored, raw), ex=key_ttl + settings.CACHE_STALE_TTL)
+            cls.local.set(key, stored, ttl=key_ttl + settings.CACHE_STALE_TTL, stale_at=now + key_ttl)
+        await _timed(pipe.execute())
+
+    @classmethod
+    async def acquire_lock(cls, key: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Take the cross-worker lock on `key` for `timeout` seconds (CACHE_LOCK_TIMEOUT by default).
+        Returns the token release_lock needs, or None when another holder has it.
+        """
+        token = uuid.uuid4().hex
+        px = int((timeout or settings.CACHE_LOCK_TIMEOUT) * 1000)
+        acquired = await _timed(cls.client.set(f"lock:{key}", token, nx=True, px=px))
+        return token if acquired else None
+
+    @classmethod
+    async def release_lock(cls, key: str, token: str):
+        lock_key = f"lock:{key}"
+        async with cls.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(lock_key)
+                if await pipe.get(lock_key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    await pipe.execute()
+            except redis.WatchError:
+                pass
+
+    @classmethod
+    async def _wait_for(cls, key: str, raw: bool) -> Any:
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await cls._read_through(key, raw)
+            if entry is not None:
+                return None if entry[0] is ABSENT else entry[0]
+        return _MISS
+
+    @classmethod
+    async def record_activity(cls, key: str, member: str, window: int):
+        """
+        Note that `member` was active now, in the sorted set `key` (scored by time), dropping
+        members idle for longer than `window` seconds. One pipelined round trip.
+        """
+        if not cls.client:
+            return
+        now = time.time()
+        pipe = cls.client.pipeline(transaction=False)
+        pipe.zadd(key, {member: now})
+        pipe.zremrangebyscore(key, "-inf", now - window)
+        pipe.expire(key, window)
+        await _timed(pipe.execute())
+
+    @classmethod
+    async def recent_members(cls, key: str, window: int, limit: Optional[int] = None) -> List[str]:
+        """
+        Members of `key` active in the last `window` seconds, most recent first.
+        """
+        if not cls.client:
+            return []
+        members = await _timed(cls.client.zrevrangebyscore(
+            key, "+inf", time.time() - window, start=0 if limit else None, num=limit
+        ))
+        return [member.decode() for member in members]
+
+    @classmethod
+    async def delete(cls, *keys: str):
+        await cls.delete_many(keys)
+
+    @classmethod
+    async def delete_many(cls, keys: Iterable[str]):
+        """
+        Delete keys from Redis and from the L1 tier of every worker subscribed to the invalidation
+        channel, in one pipelined round trip.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not cls.client or not keys:
+            return
+        cls.local.delete(*keys)
+        message = orjson.dumps({"origin": cls.instance_id, "keys": keys})
+        await _timed(cls.client.pipeline(transaction=False).delete(*keys).publish(INVALIDATION_CHANNEL, message).execute())
+
+    @classmethod
+    async def generations(cls, scopes: List[str]) -> List[int]:
+        """
+        Current generation of each scope, 0 if it was never bumped. Embed these in derived keys
+        (see `versioned`) so that one `bump` orphans every key built from the old generation.
+        """
+        if not cls.client or not scopes:
+            return [0] * len(scopes)
+        keys = [GENERATION_PREFIX + scope for scope in scopes]
+        values = await cls.get_many(keys)
+        for key, value in zip(keys, values):
+            if value is None:
+                # Remember "never bumped" locally; a later bump invalidates it like any other key
+                cls.local.set(key, 0)
+        return [value or 0 for value in values]
+
+    @staticmethod
+    def versioned(key: str, generations: Iterable[int]) -> str:
+        return f"{key}:v" + ".".join(str(g) for g in generations)
+
+    @classmethod
+    async def bump(cls, *scopes: str):
+        """
+        Advance the generation of the given scopes on every worker, in one round trip. Keys derived
+        from the previous generation are never read again and simply run out their TTL.
+        """
+        keys = list(dict.fromkeys(GENERATION_PREFIX + scope for scope in scopes))
+        if not cls.client or not keys:
+            return
+        cls.local.delete(*keys)
+        pipe = cls.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.publish(INVALIDATION_CHANNEL, orjson.dumps({"origin": cls.instance_id, "keys": keys}))
+        await _timed(pipe.execute())
+
+    @classmethod
+    def apply_invalidation(cls, data: bytes):
+        message = orjson.loads(data)
+        if message.get("origin") != cls.instance_id:
+            cls.local.delete(*message.get("keys", []))
+
+    @classmethod
+    async def _listen(cls):
+        while cls.client:
+            pubsub = cls.client.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        cls.apply_invalidation(message["data"])
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except (redis.RedisError, OSError, ValueError):
+                # Invalidations may have been missed while disconnected
+                cls.local.clear()
+                await pubsub.aclose()
+                await asyncio.sleep(1)
+
+    @classmethod
+    def stats(cls) -> dict:
+        lookups = cls.l1_hits + cls.l2_hits + cls.misses
+        l2_lookups = cls.l2_hits + cls.misses
+        return {
+            "l1": {
+                "hits": cls.l1_hits,
+                "hit_ratio": cls.l1_hits / lookups if lookups else 0.0,
+                "entries": len(cls.local),
+            },
+            "l2": {
+                "hits": cls.l2_hits,
+                "hit_ratio": cls.l2_hits / l2_lookups if l2_lookups else 0.0,
+            },
+            "misses": cls.misses,
+            "lookups": lookups,
+        }
 
 cache = CacheManager()
+
+registry.register(Gauge("cache_l1_entries", "Entries in this worker's in-process cache tier.", lambda: len(CacheManager.local)))
@@ -5,6 +5,76 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     REDIS_URL: str
 
+    # Connection pool, per worker process: size Postgres max_connections against
+    # uvicorn workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_COMMAND_TIMEOUT: float = 30.0
+
+    # Read replicas for GET traffic, comma-separated; empty sends everything to DATABASE_URL.
+    # A failing replica is skipped for DB_REPLICA_COOLDOWN seconds, and a user who just wrote
+    # reads from the primary for READ_YOUR_WRITES_WINDOW seconds (keep it above replication lag).
+    # Workers remember "no recent write" for READ_YOUR_WRITES_CHECK_TTL seconds
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_COOLDOWN: float = 30.0
+    READ_YOUR_WRITES_WINDOW: int = 5
+    READ_YOUR_WRITES_CHECK_TTL: float = 1.0
+
+    # In-process (L1) cache tier in front of Redis
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L1_TTL: int = 30
+
+    # Stampede protection: stale-while-revalidate window, loader lock and XFetch beta
+    CACHE_STALE_TTL: int = 60
+    CACHE_LOCK_TIMEOUT: float = 5.0
+    CACHE_LOCK_WAIT: float = 2.0
+    CACHE_EARLY_REFRESH_BETA: float = 1.0
+    # Lifetime of "known absent" and empty results
+    CACHE_NEGATIVE_TTL: int = 60
+
+    # Term new enrollments are recorded under (grades recorded now enroll the student in it)
+    CURRENT_TERM: str = "2026-2"
+
+    # Academic keys are invalidated by generation bumps, so the TTL only bounds memory use
+    ACADEMIC_CACHE_TTL: int = 6 * 60 * 60
+
+    # Grade history pagination and NDJSON streaming
+    GRADE_PAGE_MAX_LIMIT: int = 200
+    GRADE_STREAM_BATCH_SIZE: int = 500
+
+    # Bulk grade import: rows staged per COPY, and invalid rows reported before giving up
+    GRADE_IMPORT_BATCH_SIZE: int = 5000
+    GRADE_IMPORT_MAX_ERRORS: int = 100
+
+    # argon2 worker processes (0 = one per core) and admission limit
+    HASH_POOL_WORKERS: int = 0
+    HASH_POOL_MAX_PENDING: int = 64
+
+    # Trust role/active claims in the token and only check the per-user token version
+    AUTH_STATELESS: bool = True
+    TOKEN_VERSION_CACHE_TTL: int = 3600
+
+    # Cache warm-up for students who logged in within CACHE_WARMUP_WINDOW seconds: batch size,
+    # students per second, and the pool saturation above which it pauses for live traffic
+    CACHE_WARMUP_ON_STARTUP: bool = False
+    CACHE_WARMUP_WINDOW: int = 7 * 24 * 60 * 60
+    CACHE_WARMUP_BATCH_SIZE: int = 200
+    CACHE_WARMUP_RATE: float = 500.0
+    CACHE_WARMUP_MAX_SATURATION: float = 0.5
+
+    # Prometheus metrics at /metrics (per worker process)
+    METRICS_ENABLED: bool = True
+
+    # Per-statement Server-Timing entries (slowest first); never enable in production
+    DEBUG: bool = False
+    SERVER_TIMING_DETAIL_LIMIT: int = 10
+    # Similar SELECTs in one request before an N+1 warning is logged
+    N_PLUS_ONE_THRESHOLD: int = 5
+
     class Config:
         case_sensitive = True
 
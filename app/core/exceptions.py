@@ -10,3 +10,13 @@ class UserNotFoundError(Exception):
 
 class InactiveUserError(Exception):
     pass
+
+class HashingPoolBusyError(Exception):
+    pass
+
+class InvalidCursorError(Exception):
+    pass
+
+class GradeImportError(Exception):
+    def __init__(self, errors: list):
+        self.errors = errors
@@ -0,0 +1,100 @@
+from typing import Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+import os
+import time
+from app.core import security, timing
+from app.core.config import settings
+from app.core.exceptions import HashingPoolBusyError
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_WAIT, Gauge, registry
+
+def _timed(fn: Callable, *args):
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic()
+
+class HashingPool:
+    """
+    Runs argon2 hashing and verification in worker processes so it never blocks the event loop.
+
+    At most `max_pending` jobs are admitted (running plus queued); callers beyond that fail fast
+    with HashingPoolBusyError instead of piling up behind a saturated pool.
+    """
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, fn: Callable, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingPoolBusyError()
+
+        self.start()
+        self._pending += 1
+        submitted = time.monotonic()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _timed, fn, *args
+            )
+        except BrokenProcessPool:
+            self._executor = None
+            raise
+        finally:
+            self._pending -= 1
+
+        queue_wait = max(started - submitted, 0.0)
+        hash_time = finished - started
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.hash_time_total += hash_time
+        self.hash_time_max = max(self.hash_time_max, hash_time)
+        PASSWORD_HASH_QUEUE_WAIT.observe(queue_wait, operation)
+        PASSWORD_HASH_DURATION.observe(hash_time, operation)
+        timing.record_hash(time.monotonic() - submitted)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", security.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", security.verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / self.completed if self.completed else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+            "hash_time_avg": self.hash_time_total / self.completed if self.completed else 0.0,
+            "hash_time_max": self.hash_time_max,
+        }
+
+hashing_pool = HashingPool(settings.HASH_POOL_WORKERS, settings.HASH_POOL_MAX_PENDING)
+
+registry.register(Gauge("password_hash_pending", "Hashing jobs running or queued in this worker.", lambda: hashing_pool._pending))
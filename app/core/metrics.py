@@ -0,0 +1,169 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Seconds; finer than Prometheus' defaults at the low end, where cache and index lookups land
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """
+    Base for metrics kept in this worker's memory. Updates are plain dict operations on the event
+    loop thread, so they need no locks; each process is scraped on its own.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += self.samples()
+        return lines
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labels, key)} {_number(v)}" for key, v in list(self._values.items())]
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last one is +Inf), sum, count]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+class Gauge(Metric):
+    """
+    A value read when scraped: `collect` returns a number, or {label values: number}. Without one,
+    each label set is read from the callable `track` registered for it.
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Optional[Callable[[], Union[float, Dict[tuple, float]]]] = None,
+        labels: Iterable[str] = (),
+    ):
+        super().__init__(name, help, labels)
+        self.collect = collect or self._collect_tracked
+        self._tracked: Dict[tuple, Callable[[], float]] = {}
+
+    def track(self, read: Callable[[], float], *labels: str):
+        self._tracked[labels] = read
+
+    def _collect_tracked(self) -> Dict[tuple, float]:
+        return {labels: read() for labels, read in list(self._tracked.items())}
+
+    def samples(self) -> List[str]:
+        values = self.collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_labels(self.labels, key)} {_number(v)}" for key, v in values.items()]
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "cache_lookups_total", "Cache lookups by key family and result (l1_hit, l2_hit, miss, error).", ("family", "result")
+))
+DB_QUERY_DURATION = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time (and count) by statement type.", ("operation",)
+))
+PASSWORD_HASH_DURATION = registry.register(Histogram(
+    "password_hash_duration_seconds", "argon2 time in the hashing pool, excluding queueing.", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+PASSWORD_HASH_QUEUE_WAIT = registry.register(Histogram(
+    "password_hash_queue_wait_seconds", "Time hashing jobs waited for a free worker process.", ("operation",)
+))
+AUTH_DURATION = registry.register(Histogram(
+    "auth_duration_seconds", "Login and per-request token checks by outcome.", ("operation", "outcome")
+))
+DB_POOL_CHECKOUT_DURATION = registry.register(Histogram(
+    "db_pool_checkout_duration_seconds", "Time to get a connection from a pool (waiting for a slot, connecting, pre-ping).", ("pool",)
+))
+DB_POOL_CHECKED_OUT = registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently in use, per pool of this worker.", labels=("pool",)
+))
+DB_POOL_OVERFLOW = registry.register(Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size, per pool of this worker.", labels=("pool",)
+))
@@ -0,0 +1,108 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bind parameters differ between drivers ("?", "$1", "%(id)s") and IN lists expand to one per value
+_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize(statement: str) -> str:
+    """
+    Statement text with parameters collapsed, so the same query issued for different rows (or
+    different numbers of IN values) compares equal.
+    """
+    statement = _PARAMETER.sub("?", statement)
+    statement = _PARAMETER_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+class RequestTimings:
+    """
+    Time spent by one request in SQL, Redis and password hashing. Set up per request by
+    ServerTimingMiddleware and filled in by the engine events, CacheManager and the hashing pool.
+    """
+    __slots__ = ("db_count", "db_time", "cache_count", "cache_time", "hash_count", "hash_time", "statements", "slowest")
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.cache_count = 0
+        self.cache_time = 0.0
+        self.hash_count = 0
+        self.hash_time = 0.0
+        # Raw statement text -> executions; normalized only when the request finishes
+        self.statements: Counter = Counter()
+        # (seconds, statement) for the debug detail
+        self.slowest: List[Tuple[float, str]] = []
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        SELECTs run at least `threshold` times with only their parameters changing: an N+1 pattern.
+        """
+        counts: Counter = Counter()
+        for statement, count in self.statements.items():
+            if statement.lstrip()[:6].upper() == "SELECT":
+                counts[normalize(statement)] += count
+        return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def start() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+def record_sql(statement: str, elapsed: float):
+    timings = _current.get()
+    if timings is None:
+        return
+    timings.db_count += 1
+    timings.db_time += elapsed
+    timings.statements[statement] += 1
+    if settings.DEBUG:
+        timings.slowest.append((elapsed, statement))
+
+def record_cache(elapsed: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_count += 1
+        timings.cache_time += elapsed
+
+def record_hash(elapsed: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.hash_count += 1
+        timings.hash_time += elapsed
+
+def _description(text: str, limit: int = 80) -> str:
+    text = _WHITESPACE.sub(" ", text).strip().replace('"', "'")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def server_timing(timings: RequestTimings, total: float, detail: bool = False) -> str:
+    """
+    The Server-Timing header value (durations in milliseconds). With `detail`, the slowest
+    statements are listed as well.
+    """
+    entries = [
+        f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_count} queries"',
+        f'cache;dur={timings.cache_time * 1000:.1f};desc="{timings.cache_count} calls"',
+    ]
+    if timings.hash_count:
+        entries.append(f'hash;dur={timings.hash_time * 1000:.1f};desc="{timings.hash_count} calls"')
+    entries.append(f"app;dur={total * 1000:.1f}")
+    if detail:
+        for i, (elapsed, statement) in enumerate(sorted(timings.slowest, reverse=True)[:settings.SERVER_TIMING_DETAIL_LIMIT]):
+            entries.append(f'sql-{i + 1};dur={elapsed * 1000:.1f};desc="{_description(statement)}"')
+    return ", ".join(entries)
+
+def warn_repeated_statements(timings: RequestTimings, method: str, path: str):
+    for statement, count in timings.repeated_statements(settings.N_PLUS_ONE_THRESHOLD):
+        logger.warning("Possible N+1: %s %s ran %d similar queries: %s", method, path, count, _description(statement, 200))
@@ -1,21 +1,284 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel
+import itertools
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import event, exc, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import timing
+from app.core.cache import cache
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_DURATION, DB_POOL_OVERFLOW, DB_QUERY_DURATION
 from fastapi import Depends
-from typing import Annotated
+from typing import Annotated, Any, AsyncIterator, List, Optional
 
-engine = create_async_engine(settings.DATABASE_URL, future=True)
+logger = logging.getLogger(__name__)
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkout latency (waiting for a free slot, connecting, pre-ping) and timeouts,
+    labelled in the metrics by the pool's logging name.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        elapsed = time.perf_counter() - started
+        self.checkouts += 1
+        self.checkout_time_total += elapsed
+        self.checkout_time_max = max(self.checkout_time_max, elapsed)
+        DB_POOL_CHECKOUT_DURATION.observe(elapsed, self.logging_name or "default")
+        return connection
+
+def engine_options(database_url: str, name: str = "primary") -> dict:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": MeteredQueuePool,
+        "pool_logging_name": name,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "command_timeout": settings.DB_COMMAND_TIMEOUT,
+        }
+    return options
+
+engine = create_async_engine(settings.DATABASE_URL, future=True, **engine_options(settings.DATABASE_URL))
+
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    operation = statement.lstrip()[:6].upper()
+    DB_QUERY_DURATION.observe(elapsed, operation if operation in _OPERATIONS else "OTHER")
+    timing.record_sql(statement, elapsed)
+
+def instrument(sync_engine):
+    """
+    Time every statement the engine runs, into the db_query_duration_seconds histogram and the
+    current request's timings.
+    """
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+instrument(engine.sync_engine)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Serializes startup migrations when several workers boot at once (PostgreSQL)
+_MIGRATION_LOCK_ID = 7_319_015
+
+def run_migrations(connection: Connection, revision: str = "head"):
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+
+    postgres = connection.dialect.name == "postgresql"
+    if postgres:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _MIGRATION_LOCK_ID})
+    try:
+        current = MigrationContext.configure(connection).get_current_revision()
+        if current is None and inspect(connection).has_table("user"):
+            # Created by create_all before migrations existed: that schema is the baseline
+            command.stamp(config, "0001")
+        connection.commit()
+        command.upgrade(config, revision)
+    finally:
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _MIGRATION_LOCK_ID})
+        connection.commit()
 
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    async with engine.connect() as conn:
+        await conn.run_sync(run_migrations)
 
 async def get_session() -> AsyncSession:
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
     async with async_session() as session:
         yield session
 
+# Errors that mean the replica itself is unreachable, as opposed to a bad query
+_CONNECTION_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError)
+
+class ReplicaSession(AsyncSession):
+    """
+    Session on a read replica. When the replica can't be reached, it is taken out of rotation and
+    the statement is retried on the primary, so a failing replica costs a retry rather than an error.
+    """
+    def __init__(self, *args, replica: "Replica", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    async def execute(self, *args, **kwargs) -> Any:
+        try:
+            return await super().execute(*args, **kwargs)
+        except _CONNECTION_ERRORS:
+            if not await self._fail_over():
+                raise
+            return await super().execute(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs) -> Any:
+        try:
+            return await super().stream(*args, **kwargs)
+        except _CONNECTION_ERRORS:
+            if not await self._fail_over():
+                raise
+            return await super().stream(*args, **kwargs)
+
+    async def _fail_over(self) -> bool:
+        if not self.info.get("replica"):
+            # Already on the primary: nothing left to fall back to
+            return False
+        replicas.mark_down(self.replica)
+        # Drops the failed connection; the session stays usable and reconnects on the new bind
+        await self.close()
+        self.bind = engine
+        self.sync_session.bind = engine.sync_engine
+        self.info["replica"] = False
+        return True
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(url, future=True, **engine_options(url, name=self.url))
+        instrument(self.engine.sync_engine)
+        self.sessions = async_sessionmaker(
+            self.engine, class_=ReplicaSession, expire_on_commit=False, replica=self, info={"replica": True}
+        )
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+class ReplicaSet:
+    """
+    Read replicas used round-robin. A replica whose connection fails is skipped for
+    DB_REPLICA_COOLDOWN seconds, then tried again; with none available reads go to the primary.
+    """
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._turn = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        start = next(self._turn)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica):
+        replica.failures += 1
+        replica.down_until = time.monotonic() + settings.DB_REPLICA_COOLDOWN
+        logger.warning("Read replica %s failed, skipping it for %ss", replica.url, settings.DB_REPLICA_COOLDOWN)
+
+    def stats(self) -> list:
+        return [
+            {"url": r.url, "healthy": r.healthy, "failures": r.failures, "saturation": pool_stats(r.engine).get("saturation")}
+            for r in self.replicas
+        ]
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+replicas = ReplicaSet([url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()])
+
+def _read_your_writes_key(user_id: uuid.UUID) -> str:
+    return f"rw:{user_id}"
+
+async def mark_written(*user_ids: uuid.UUID):
+    """
+    Call after committing a change that these users will read back: for READ_YOUR_WRITES_WINDOW
+    seconds their reads go to the primary instead of a replica that may not have it yet.
+    """
+    if replicas and user_ids:
+        # Other workers drop the "no recent write" answer they may be holding in L1
+        await cache.set_many(
+            {_read_your_writes_key(u): 1 for u in user_ids}, ttl=settings.READ_YOUR_WRITES_WINDOW, broadcast=True
+        )
+
+async def _wrote_recently(user_id: uuid.UUID) -> bool:
+    key = _read_your_writes_key(user_id)
+    written = await cache.get(key)
+    if written is None:
+        # Remember the miss briefly too, so a busy user doesn't cost a Redis round trip per request
+        cache.set_local(key, 0, ttl=settings.READ_YOUR_WRITES_CHECK_TTL)
+    return bool(written)
+
+@asynccontextmanager
+async def read_session(user_id: Optional[uuid.UUID] = None) -> AsyncIterator[AsyncSession]:
+    """
+    A session for read-only work: on a replica when one is healthy, unless `user_id` wrote recently.
+    """
+    replica = None
+    if replicas and not (user_id and await _wrote_recently(user_id)):
+        replica = replicas.pick()
+    sessions = replica.sessions if replica else async_session
+    async with sessions() as session:
+        yield session
+
+def pool_stats(bind: Optional[AsyncEngine] = None) -> dict:
+    """
+    Checkout counters of an engine's pool: the primary by default, or a replica's.
+    """
+    pool = (bind or engine).pool
+    if not isinstance(pool, MeteredQueuePool):
+        return {"pool": pool.status()}
+
+    capacity = pool.size() + settings.DB_MAX_OVERFLOW
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        # QueuePool counts connections not opened yet as negative overflow
+        "overflow": max(pool.overflow(), 0),
+        "saturation": pool.checkedout() / capacity if capacity else 0.0,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "checkout_time_avg": pool.checkout_time_total / pool.checkouts if pool.checkouts else 0.0,
+        "checkout_time_max": pool.checkout_time_max,
+    }
+
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+
+def _track_pool(bind: AsyncEngine, name: str):
+    DB_POOL_CHECKED_OUT.track(lambda: pool_stats(bind).get("checked_out", 0), name)
+    DB_POOL_OVERFLOW.track(lambda: pool_stats(bind).get("overflow", 0), name)
+
+_track_pool(engine, "primary")
+for replica in replicas.replicas:
+    _track_pool(replica.engine, replica.url)
@@ -1,18 +1,33 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.config import settings
-from app.db.session import init_db
+from app.db.session import init_db, async_session, replicas
 from app.api.api import api_router
+from app.api.endpoints import metrics
+from app.api.middleware import MetricsMiddleware, ServerTimingMiddleware
 from app.core import exceptions
 from app.api import handlers
 from app.core.cache import cache
+from app.core.hashing import hashing_pool
+from app.services.catalog_service import catalog_service
+from app.services.warmup_service import warmup_service
 from fastapi.middleware.cors import CORSMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
     await cache.connect()
+    async with async_session() as session:
+        await catalog_service.load(session)
+    hashing_pool.start()
+    # In the background so the worker starts serving immediately; requests fill the cache meanwhile
+    warmup = asyncio.create_task(warmup_service.warm_on_startup()) if settings.CACHE_WARMUP_ON_STARTUP else None
     yield
+    if warmup:
+        warmup.cancel()
+    hashing_pool.shutdown()
+    await replicas.dispose()
     await cache.close()
 
 app = FastAPI(
@@ -34,6 +49,15 @@ app.add_exception_handler(exceptions.UserAlreadyExistsError, handlers.user_alrea
 app.add_exception_handler(exceptions.InvalidCredentialsError, handlers.invalid_credentials_handler)
 app.add_exception_handler(exceptions.UserNotFoundError, handlers.user_not_found_handler)
 app.add_exception_handler(exceptions.InactiveUserError, handlers.inactive_user_handler)
+app.add_exception_handler(exceptions.HashingPoolBusyError, handlers.hashing_pool_busy_handler)
+app.add_exception_handler(exceptions.InvalidCursorError, handlers.invalid_cursor_handler)
+app.add_exception_handler(exceptions.GradeImportError, handlers.grade_import_handler)
+
+app.add_middleware(ServerTimingMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router, tags=["metrics"])
+
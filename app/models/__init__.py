@@ -1,3 +1,3 @@
 # Expose models for easier imports and for SQLModel metadata collection
 from .user import User, Role
-from .academic import Subject, Grade, Schedule
+from .academic import Subject, Grade, Schedule, Enrollment, GradeAggregate
@@ -1,8 +1,11 @@
 from typing import Optional, List
 from enum import Enum
+from sqlalchemy import Index, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime, time
 import uuid
+from app.core.config import settings
 
 class SubjectBase(SQLModel):
     code: str = Field(index=True, unique=True) 
@@ -23,9 +26,19 @@ class GradeBase(SQLModel):
     evaluation_date: Optional[datetime] = None
 
 class Grade(GradeBase, table=True):
+    __table_args__ = (
+        # Enrollment (DISTINCT subject_id per student); also serves lookups by student_id alone
+        Index("ix_grade_student_id_subject_id", "student_id", "subject_id"),
+        # Keyset pagination of a student's grade history, covering the listed columns on PostgreSQL
+        Index(
+            "ix_grade_student_id_evaluation_date_id", "student_id", "evaluation_date", "id",
+            postgresql_include=["subject_id", "value", "weight", "evaluation_name"],
+        ),
+    )
+
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     
-    student_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    student_id: uuid.UUID = Field(foreign_key="user.id")
     subject_id: uuid.UUID = Field(foreign_key="subject.id", index=True)
     
     subject: Subject = Relationship(back_populates="grades")
@@ -49,6 +62,106 @@ class ScheduleBase(SQLModel):
 class Schedule(ScheduleBase, table=True):
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     
-    subject_id: uuid.UUID = Field(foreign_key="subject.id")
+    subject_id: uuid.UUID = Field(foreign_key="subject.id", index=True)
     
     subject: Subject = Relationship(back_populates="schedules")
+
+class Enrollment(SQLModel, table=True):
+    """
+    A student taking a subject in a term. Recording a grade enrolls the student in the current term
+    (see the Grade events below), but enrollment does not depend on having grades.
+    """
+    __table_args__ = (
+        # Rosters; lookups by student use the primary key prefix
+        Index("ix_enrollment_subject_id_term", "subject_id", "term"),
+    )
+
+    student_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    subject_id: uuid.UUID = Field(foreign_key="subject.id", primary_key=True)
+    term: str = Field(default_factory=lambda: settings.CURRENT_TERM, primary_key=True)
+
+class GradeAggregate(SQLModel, table=True):
+    """
+    Running weighted totals per student and subject, kept in step with Grade writes by the mapper
+    events below so summaries read O(subjects) rows instead of rescanning every grade. Grades that
+    predate the table are backfilled by migration 0004.
+    """
+    student_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    subject_id: uuid.UUID = Field(foreign_key="subject.id", primary_key=True)
+    weighted_sum: float = 0.0
+    weight_total: float = 0.0
+    grade_count: int = 0
+
+def dialect_insert(connection):
+    return postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+
+def grade_aggregate_upsert(connection, rows):
+    """
+    INSERT into GradeAggregate that adds to the totals already stored for a student and subject
+    instead of failing. `rows` is either the values of one row or a select of (student_id,
+    subject_id, weighted_sum, weight_total, grade_count).
+    """
+    table = GradeAggregate.__table__
+    statement = dialect_insert(connection)(table)
+    if isinstance(rows, dict):
+        statement = statement.values(**rows)
+    else:
+        statement = statement.from_select(["student_id", "subject_id", "weighted_sum", "weight_total", "grade_count"], rows)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.student_id, table.c.subject_id],
+        set_={
+            "weighted_sum": table.c.weighted_sum + statement.excluded.weighted_sum,
+            "weight_total": table.c.weight_total + statement.excluded.weight_total,
+            "grade_count": table.c.grade_count + statement.excluded.grade_count,
+        },
+    )
+
+def _enroll(connection, student_id, subject_id):
+    statement = dialect_insert(connection)(Enrollment.__table__).values(
+        student_id=student_id,
+        subject_id=subject_id,
+        term=settings.CURRENT_TERM,
+    )
+    connection.execute(statement.on_conflict_do_nothing())
+
+def _apply_grade_delta(connection, student_id, subject_id, value: float, weight: float, sign: int):
+    connection.execute(grade_aggregate_upsert(connection, {
+        "student_id": student_id,
+        "subject_id": subject_id,
+        "weighted_sum": sign * value * weight,
+        "weight_total": sign * weight,
+        "grade_count": sign,
+    }))
+
+def _previous(state, attr: str):
+    history = state.attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(state.object, attr)
+
+@event.listens_for(Grade, "after_insert")
+def _grade_inserted(mapper, connection, target: Grade):
+    _enroll(connection, target.student_id, target.subject_id)
+    _apply_grade_delta(connection, target.student_id, target.subject_id, target.value, target.weight, 1)
+
+@event.listens_for(Grade, "after_update")
+def _grade_updated(mapper, connection, target: Grade):
+    state = inspect(target)
+    tracked = ("student_id", "subject_id", "value", "weight")
+    if not any(state.attrs[attr].history.has_changes() for attr in tracked):
+        return
+    old = {attr: _previous(state, attr) for attr in tracked}
+    if (old["student_id"], old["subject_id"]) != (target.student_id, target.subject_id):
+        _enroll(connection, target.student_id, target.subject_id)
+    _apply_grade_delta(connection, old["student_id"], old["subject_id"], old["value"], old["weight"], -1)
+    _apply_grade_delta(connection, target.student_id, target.subject_id, target.value, target.weight, 1)
+
+@event.listens_for(Grade, "after_delete")
+def _grade_deleted(mapper, connection, target: Grade):
+    state = inspect(target)
+    _apply_grade_delta(
+        connection,
+        _previous(state, "student_id"),
+        _previous(state, "subject_id"),
+        _previous(state, "value"),
+        _previous(state, "weight"),
+        -1,
+    )
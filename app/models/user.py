@@ -18,10 +18,15 @@ class UserBase(SQLModel):
 class User(UserBase, table=True):
     id: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    token_version: int = Field(default=0)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-class UserCreate(UserBase):
+class UserCreate(SQLModel):
+    # Public signup: role and is_active are not accepted here, so new accounts are always active students
+    email: str
+    username: str
+    full_name: str
     password: str
 
 class UserRead(UserBase):
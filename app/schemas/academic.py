@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, time
-from sqlmodel import SQLModel 
+from sqlmodel import SQLModel, Field
 from uuid import UUID
 
 class SubjectRead(SQLModel):
@@ -27,3 +27,39 @@ class ScheduleRead(SQLModel):
     classroom: str
     subject_name: str
     subject_code: str
+
+class AcademicOverview(SQLModel):
+    subjects: List[SubjectRead]
+    grades: List[GradeRead]
+    schedule: List[ScheduleRead]
+
+class SubjectAverageRead(SQLModel):
+    subject_id: UUID
+    subject_code: str
+    subject_name: str
+    credits: int
+    average: Optional[float] = None
+    weight_total: float
+    grade_count: int
+
+class GradeSummary(SQLModel):
+    subjects: List[SubjectAverageRead]
+    gpa: Optional[float] = None
+
+class GradePage(SQLModel):
+    items: List[GradeRead]
+    next_cursor: Optional[str] = None
+
+class GradeImportRow(SQLModel):
+    username: str
+    subject_code: str
+    evaluation_name: str
+    value: float
+    weight: float = Field(default=1.0, gt=0)
+    evaluation_date: Optional[datetime] = None
+
+class GradeImportResult(SQLModel):
+    received: int
+    inserted: int
+    skipped: int
+    students: int
@@ -1,5 +1,7 @@
 from typing import Optional
+from uuid import UUID
 from sqlmodel import SQLModel
+from app.models.user import Role
 
 class Token(SQLModel):
     access_token: str
@@ -7,3 +9,12 @@ class Token(SQLModel):
 
 class TokenPayload(SQLModel):
     sub: Optional[str] = None
+    role: Optional[Role] = None
+    active: Optional[bool] = None
+    ver: Optional[int] = None
+
+class Principal(SQLModel):
+    id: UUID
+    role: Role
+    is_active: bool
+    token_version: int
@@ -1,88 +1,364 @@
-from typing import List
-import time
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID
-from sqlmodel import select, col
-from sqlalchemy.orm import selectinload
+import orjson
+from sqlmodel import select, col, delete, func, or_
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.academic import Subject, Grade, Schedule
+from app.models.academic import Grade, Enrollment, GradeAggregate
 from app.core.cache import cache
-from app.schemas.academic import GradeRead, ScheduleRead
+from app.core.config import settings
+from app.core.exceptions import InvalidCursorError
+from app.db.session import mark_written
+from app.schemas.academic import SubjectAverageRead, GradeSummary
+from app.services.catalog_service import Catalog, catalog_service
+
+# Grade columns cached per student; subject fields are joined in from the catalog snapshot
+_GRADE_COLUMNS = (
+    Grade.id,
+    Grade.value,
+    Grade.weight,
+    Grade.evaluation_name,
+    Grade.evaluation_date,
+    Grade.subject_id,
+)
+
+def _grade_row(row) -> list:
+    grade_id, value, weight, evaluation_name, evaluation_date, subject_id = row
+    return [str(grade_id), value, weight, evaluation_name, evaluation_date.isoformat() if evaluation_date else None, str(subject_id)]
+
+def _grade_item(row: list, catalog: Catalog) -> dict:
+    subject = catalog.subjects[row[5]]
+    return {
+        "id": row[0],
+        "value": row[1],
+        "weight": row[2],
+        "evaluation_name": row[3],
+        "evaluation_date": row[4],
+        "subject_name": subject.name,
+        "subject_code": subject.code,
+    }
+
+def _history_order():
+    # Matches the (student_id, evaluation_date, id) index; undated evaluations sort last
+    return (col(Grade.evaluation_date).asc().nulls_last(), col(Grade.id).asc())
+
+def encode_cursor(evaluation_date: Optional[datetime], grade_id: UUID) -> str:
+    position = [evaluation_date.isoformat() if evaluation_date else None, str(grade_id)]
+    return base64.urlsafe_b64encode(orjson.dumps(position)).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], UUID]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        evaluation_date, grade_id = orjson.loads(data)
+        return (datetime.fromisoformat(evaluation_date) if evaluation_date else None), UUID(grade_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise InvalidCursorError()
 
 class AcademicService:
+    """
+    Reads return the JSON response body as bytes. Per student, the cache holds only subject IDs and
+    grade columns; subject and schedule fields are joined in memory from the catalog snapshot, and
+    the assembled bodies are memoized in the worker's L1 tier.
+    """
+    @staticmethod
+    async def generations(student_id: UUID) -> List[int]:
+        """
+        Every cached entry embeds the student's generation and the catalog's (subjects, schedules),
+        so bumping either one invalidates all of them at once.
+        """
+        return await cache.generations([f"student:{student_id}", "catalog"])
+
+    @staticmethod
+    async def cache_keys(student_id: UUID) -> Dict[str, str]:
+        generations = await AcademicService.generations(student_id)
+        return {
+            name: cache.versioned(f"{name}:{student_id}", generations)
+            for name in ("enrolled", "grades", "summary")
+        }
+
+    @staticmethod
+    async def invalidate(*student_ids: UUID):
+        """
+        Call after committing grade or enrollment changes for these students.
+        """
+        await cache.bump(*(f"student:{student_id}" for student_id in student_ids))
+        # Until replicas catch up, their next reads must not re-cache the old rows
+        await mark_written(*student_ids)
+
+    @staticmethod
+    async def invalidate_catalog():
+        """
+        Call after committing subject or schedule changes; affects every student and swaps the
+        catalog snapshot on every worker.
+        """
+        await cache.bump("catalog")
+
+    @staticmethod
+    def _enrolled(student_id: UUID):
+        # Subjects of every term, once each even when retaken; a range scan of the Enrollment primary key
+        return select(Enrollment.subject_id).where(Enrollment.student_id == student_id).distinct()
+
+    @staticmethod
+    async def _load_enrolled(session: AsyncSession, student_id: UUID) -> List[str]:
+        result = await session.execute(AcademicService._enrolled(student_id))
+        return [str(subject_id) for subject_id in result.scalars().all()]
+
+    @staticmethod
+    async def _load_grades(session: AsyncSession, student_id: UUID) -> List[list]:
+        result = await session.execute(select(*_GRADE_COLUMNS).where(Grade.student_id == student_id))
+        return [_grade_row(row) for row in result.all()]
+
+    @staticmethod
+    async def _student_data(session: AsyncSession, student_id: UUID, generations: List[int], names: List[str]) -> Dict[str, Any]:
+        """
+        Cached per-student data ("enrolled" subject IDs, "grades" rows) in one multi-key read;
+        misses go through get_or_set to keep its stampede protection.
+        """
+        loaders = {"enrolled": AcademicService._load_enrolled, "grades": AcademicService._load_grades}
+        keys = [cache.versioned(f"{name}:{student_id}", generations) for name in names]
+        values = await cache.get_many(keys)
+
+        data = {}
+        for name, key, value in zip(names, keys, values):
+            if value is None:
+                value = await cache.get_or_set(
+                    key, lambda load=loaders[name]: load(session, student_id), ttl=settings.ACADEMIC_CACHE_TTL
+                )
+            data[name] = value
+        return data
+
+    @staticmethod
+    async def _bodies(session: AsyncSession, student_id: UUID, parts: List[str]) -> List[bytes]:
+        """
+        Response bodies for any of "subjects", "grades" and "schedule".
+        """
+        generations = await AcademicService.generations(student_id)
+        memo_keys = [cache.versioned(f"body:{part}:{student_id}", generations) for part in parts]
+        bodies = [cache.get_local(key) for key in memo_keys]
+        missing = [part for part, body in zip(parts, bodies) if body is None]
+        if not missing:
+            return bodies
+
+        names = (["enrolled"] if {"subjects", "schedule"} & set(missing) else []) + (["grades"] if "grades" in missing else [])
+        data = await AcademicService._student_data(session, student_id, generations, names)
+        subject_ids = set(data.get("enrolled", ())) | {row[5] for row in data.get("grades", ())}
+        catalog = await catalog_service.get(session, generations[1], subject_ids)
+
+        render = {
+            "subjects": lambda: catalog.subjects_body(data["enrolled"]),
+            "schedule": lambda: catalog.schedule_body(data["enrolled"]),
+            "grades": lambda: orjson.dumps([_grade_item(row, catalog) for row in data["grades"] if row[5] in catalog]),
+        }
+        for i, part in enumerate(parts):
+            if bodies[i] is None:
+                bodies[i] = render[part]()
+                cache.set_local(memo_keys[i], bodies[i])
+        return bodies
+
+    @staticmethod
+    async def get_student_grades(session: AsyncSession, student_id: UUID) -> bytes:
+        return (await AcademicService._bodies(session, student_id, ["grades"]))[0]
+
     @staticmethod
-    async def get_student_grades(session: AsyncSession, student_id: UUID) -> List[GradeRead]:
-        key = f"grades:{student_id}"
-        cached_data = await cache.get(key)
-        if cached_data:
-            return [GradeRead(**item) for item in cached_data]
-
-        statement = select(Grade).where(Grade.student_id == student_id).options(selectinload(Grade.subject))
-        result = await session.execute(statement)
-        grades = result.scalars().all()
-        
-        dtos = [
-            GradeRead(
-                id=g.id,
-                value=g.value,
-                weight=g.weight,
-                evaluation_name=g.evaluation_name,
-                evaluation_date=g.evaluation_date,
-                subject_name=g.subject.name,
-                subject_code=g.subject.code
-            ) for g in grades
-        ]
-        
-        if dtos:
-            await cache.set(key, [dto.model_dump(mode='json') for dto in dtos], ttl=300)
-        
-        return dtos
-
-    @staticmethod
-    async def get_student_subjects(session: AsyncSession, student_id: UUID) -> List[Subject]:
-        key = f"subjects:{student_id}"
-        
-        cached_data = await cache.get(key)
-        if cached_data:
-            return [Subject.model_validate(item) for item in cached_data]
-
-        sub_query = select(Grade.subject_id).where(Grade.student_id == student_id).distinct()
-        statement = select(Subject).where(col(Subject.id).in_(sub_query))
-        result = await session.execute(statement)
-        subjects = result.scalars().all()
-        
-        if subjects:
-            await cache.set(key, [s.model_dump(mode='json') for s in subjects], ttl=300)
-            
-        return subjects
-
-    @staticmethod
-    async def get_student_schedule(session: AsyncSession, student_id: UUID) -> List[ScheduleRead]:
-        key = f"schedule:{student_id}"
-        
-        cached_data = await cache.get(key)
-        if cached_data:
-            return [ScheduleRead(**item) for item in cached_data]
-
-        sub_query = select(Grade.subject_id).where(Grade.student_id == student_id).distinct()
-        statement = select(Schedule).where(col(Schedule.subject_id).in_(sub_query)).options(selectinload(Schedule.subject))
-        result = await session.execute(statement)
-        schedules = result.scalars().all()
-        
-        dtos = [
-            ScheduleRead(
-                id=s.id,
-                day=s.day,
-                start_time=s.start_time,
-                end_time=s.end_time,
-                classroom=s.classroom,
-                subject_name=s.subject.name,
-                subject_code=s.subject.code
-            ) for s in schedules
-        ]
-        
-        if dtos:
-            await cache.set(key, [dto.model_dump(mode='json') for dto in dtos], ttl=300)
-            
-        return dtos
+    async def get_student_grade_page(
+        session: AsyncSession, student_id: UUID, cursor: Optional[str] = None, limit: int = 50
+    ) -> bytes:
+        """
+        One page of the grade history ordered by (evaluation_date, id), undated grades last.
+        The cursor is the position of the last row sent, so each page is an index range scan
+        however deep the client has paged. Pages are cached individually, under the same
+        generations as the other student keys.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        generations = await AcademicService.generations(student_id)
+
+        async def load():
+            statement = (
+                select(*_GRADE_COLUMNS)
+                .where(Grade.student_id == student_id)
+                .order_by(*_history_order())
+                .limit(limit + 1)
+            )
+            if position:
+                evaluation_date, grade_id = position
+                if evaluation_date is None:
+                    statement = statement.where(col(Grade.evaluation_date).is_(None), col(Grade.id) > grade_id)
+                else:
+                    statement = statement.where(or_(
+                        tuple_(Grade.evaluation_date, Grade.id) > tuple_(evaluation_date, grade_id),
+                        col(Grade.evaluation_date).is_(None),
+                    ))
+            result = await session.execute(statement)
+            rows = result.all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1].evaluation_date, rows[-1].id)
+
+            rows = [_grade_row(row) for row in rows]
+            catalog = await catalog_service.get(session, generations[1], {row[5] for row in rows})
+            return orjson.dumps({
+                "items": [_grade_item(row, catalog) for row in rows if row[5] in catalog],
+                "next_cursor": next_cursor,
+            })
+
+        key = cache.versioned(f"grades:page:{student_id}:{cursor or 'first'}:{limit}", generations)
+        return await cache.get_or_set(key, load, ttl=settings.ACADEMIC_CACHE_TTL, raw=True)
+
+    @staticmethod
+    async def stream_student_grades(session: AsyncSession, student_id: UUID) -> AsyncIterator[bytes]:
+        """
+        The full grade history as NDJSON, read through a server-side cursor in fixed-size batches
+        so memory does not grow with the number of grades. Not cached.
+        """
+        catalog_version = (await AcademicService.generations(student_id))[1]
+        statement = (
+            select(*_GRADE_COLUMNS)
+            .where(Grade.student_id == student_id)
+            .order_by(*_history_order())
+            .execution_options(yield_per=settings.GRADE_STREAM_BATCH_SIZE)
+        )
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            rows = [_grade_row(row) for row in rows]
+            catalog = await catalog_service.get(session, catalog_version, {row[5] for row in rows})
+            yield b"".join(orjson.dumps(_grade_item(row, catalog)) + b"\n" for row in rows if row[5] in catalog)
+
+    @staticmethod
+    async def get_student_subjects(session: AsyncSession, student_id: UUID) -> bytes:
+        return (await AcademicService._bodies(session, student_id, ["subjects"]))[0]
+
+    @staticmethod
+    async def get_student_schedule(session: AsyncSession, student_id: UUID) -> bytes:
+        return (await AcademicService._bodies(session, student_id, ["schedule"]))[0]
+
+    @staticmethod
+    async def get_student_overview(session: AsyncSession, student_id: UUID) -> bytes:
+        """
+        Subjects, grades and schedule in one call: a single multi-key cache read, and on a miss
+        two flat queries (enrolled subject IDs, grade rows) joined with the catalog in memory.
+        """
+        subjects, grades, schedule = await AcademicService._bodies(session, student_id, ["subjects", "grades", "schedule"])
+        return b'{"subjects":' + subjects + b',"grades":' + grades + b',"schedule":' + schedule + b'}'
+
+    @staticmethod
+    def _summary_body(aggregates: Dict[str, GradeAggregate], catalog: Catalog) -> bytes:
+        subjects = sorted((
+            SubjectAverageRead(
+                subject_id=s.id,
+                subject_code=s.code,
+                subject_name=s.name,
+                credits=s.credits,
+                average=round(a.weighted_sum / a.weight_total, 2) if a.weight_total else None,
+                weight_total=a.weight_total,
+                grade_count=a.grade_count
+            ) for subject_id, a in aggregates.items() if subject_id in catalog
+            for s in (catalog.subjects[subject_id],)
+        ), key=lambda s: s.subject_code)
+        graded = [s for s in subjects if s.average is not None]
+        credits = sum(s.credits for s in graded)
+        gpa = round(sum(s.average * s.credits for s in graded) / credits, 2) if credits else None
+        return orjson.dumps(GradeSummary(subjects=subjects, gpa=gpa).model_dump(mode='json'))
+
+    @staticmethod
+    async def get_student_summary(session: AsyncSession, student_id: UUID) -> bytes:
+        """
+        Weighted average per subject and the credit-weighted GPA, read from GradeAggregate.
+        """
+        generations = await AcademicService.generations(student_id)
+
+        async def load():
+            statement = select(GradeAggregate).where(
+                GradeAggregate.student_id == student_id, GradeAggregate.grade_count > 0
+            )
+            result = await session.execute(statement)
+            aggregates = {str(a.subject_id): a for a in result.scalars().all()}
+            catalog = await catalog_service.get(session, generations[1], aggregates)
+            return AcademicService._summary_body(aggregates, catalog)
+
+        key = cache.versioned(f"summary:{student_id}", generations)
+        return await cache.get_or_set(key, load, ttl=settings.ACADEMIC_CACHE_TTL, raw=True)
+
+    @staticmethod
+    async def warm(session: AsyncSession, student_ids: List[UUID]) -> int:
+        """
+        Precompute the cached entries of many students at once (enrolled subjects, grade rows and
+        summary): one generations read, three set-based queries and two pipelined writes per call,
+        instead of a round of queries per student. Returns the number of entries written.
+        """
+        if not student_ids:
+            return 0
+        scopes = [f"student:{student_id}" for student_id in student_ids] + ["catalog"]
+        *student_generations, catalog_generation = await cache.generations(scopes)
+
+        enrolled: Dict[UUID, List[str]] = {student_id: [] for student_id in student_ids}
+        result = await session.execute(
+            select(Enrollment.student_id, Enrollment.subject_id).where(col(Enrollment.student_id).in_(student_ids)).distinct()
+        )
+        for student_id, subject_id in result.all():
+            enrolled[student_id].append(str(subject_id))
+
+        grades: Dict[UUID, List[list]] = {student_id: [] for student_id in student_ids}
+        result = await session.execute(
+            select(Grade.student_id, *_GRADE_COLUMNS).where(col(Grade.student_id).in_(student_ids))
+        )
+        for student_id, *row in result.all():
+            grades[student_id].append(_grade_row(row))
+
+        aggregates: Dict[UUID, Dict[str, GradeAggregate]] = {student_id: {} for student_id in student_ids}
+        result = await session.execute(
+            select(GradeAggregate).where(col(GradeAggregate.student_id).in_(student_ids), GradeAggregate.grade_count > 0)
+        )
+        for aggregate in result.scalars().all():
+            aggregates[aggregate.student_id][str(aggregate.subject_id)] = aggregate
+        catalog = await catalog_service.get(
+            session, catalog_generation, {subject_id for a in aggregates.values() for subject_id in a}
+        )
+
+        values, bodies = {}, {}
+        for student_id, generation in zip(student_ids, student_generations):
+            generations = [generation, catalog_generation]
+            values[cache.versioned(f"enrolled:{student_id}", generations)] = enrolled[student_id]
+            values[cache.versioned(f"grades:{student_id}", generations)] = grades[student_id]
+            bodies[cache.versioned(f"summary:{student_id}", generations)] = AcademicService._summary_body(aggregates[student_id], catalog)
+        await cache.store_many(values, ttl=settings.ACADEMIC_CACHE_TTL)
+        await cache.store_many(bodies, ttl=settings.ACADEMIC_CACHE_TTL, raw=True)
+        return len(values) + len(bodies)
+
+    @staticmethod
+    async def rebuild_grade_aggregates(session: AsyncSession, student_ids: Optional[List[UUID]] = None):
+        """
+        Recompute GradeAggregate rows from Grade with one set-based SUM(value*weight), SUM(weight)
+        per (student, subject). For writes that bypass the ORM (bulk loads, seeding).
+        """
+        clear = delete(GradeAggregate)
+        totals = select(
+            Grade.student_id,
+            Grade.subject_id,
+            func.sum(Grade.value * Grade.weight),
+            func.sum(Grade.weight),
+            func.count(),
+        ).group_by(Grade.student_id, Grade.subject_id)
+        if student_ids is not None:
+            clear = clear.where(col(GradeAggregate.student_id).in_(student_ids))
+            totals = totals.where(col(Grade.student_id).in_(student_ids))
+
+        await session.execute(clear)
+        await session.execute(
+            GradeAggregate.__table__.insert().from_select(
+                ["student_id", "subject_id", "weighted_sum", "weight_total", "grade_count"], totals
+            )
+        )
+        await session.commit()
+
+        if student_ids is None:
+            # Every student may have changed; the catalog generation is part of all their keys
+            await AcademicService.invalidate_catalog()
+        else:
+            await AcademicService.invalidate(*student_ids)
 
 academic_service = AcademicService()
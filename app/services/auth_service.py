@@ -1,22 +1,43 @@
+import time
 from datetime import timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.user_service import user_service
 from app.core import security
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.hashing import hashing_pool
+from app.core.metrics import AUTH_DURATION
 from app.core.exceptions import InvalidCredentialsError, InactiveUserError
+from app.models.user import Role
 from app.schemas.token import Token
 
+# Sorted set of recently active students (scored by last login), read by the cache warm-up
+ACTIVE_STUDENTS_KEY = "active:students"
+
 class AuthService:
     @staticmethod
     async def login(session: AsyncSession, identifier: str, password: str) -> Token:
-        # Check by email first
-        user = await user_service.get_by_email(session, identifier)
-        if not user:
-            # Then check by username
-            user = await user_service.get_by_username(session, identifier)
-            
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            token = await AuthService._login(session, identifier, password)
+            outcome = "success"
+            return token
+        except InvalidCredentialsError:
+            outcome = "invalid"
+            raise
+        except InactiveUserError:
+            outcome = "inactive"
+            raise
+        finally:
+            AUTH_DURATION.observe(time.perf_counter() - started, "login", outcome)
+
+    @staticmethod
+    async def _login(session: AsyncSession, identifier: str, password: str) -> Token:
+        user = await user_service.get_by_identifier(session, identifier)
         if not user:
             raise InvalidCredentialsError()
-        if not security.verify_password(password, user.hashed_password):
+        if not await hashing_pool.verify(password, user.hashed_password):
             raise InvalidCredentialsError()
         
         if not user.is_active:
@@ -24,8 +45,12 @@ class AuthService:
 
         access_token_expires = timedelta(minutes=30)
         access_token = security.create_access_token(
-            user.id, expires_delta=access_token_expires
+            user.id,
+            expires_delta=access_token_expires,
+            claims={"role": user.role.value, "active": user.is_active, "ver": user.token_version},
         )
+        if user.role == Role.STUDENT:
+            await cache.record_activity(ACTIVE_STUDENTS_KEY, str(user.id), settings.CACHE_WARMUP_WINDOW)
         
         return Token(
             access_token=access_token,
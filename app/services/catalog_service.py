@@ -0,0 +1,98 @@
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+import orjson
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.academic import Subject, Schedule
+from app.core.cache import cache
+from app.db.session import async_session
+from app.schemas.academic import SubjectRead, ScheduleRead
+
+@dataclass(frozen=True)
+class Catalog:
+    """
+    Immutable snapshot of subjects and their schedules, keyed by subject id (as str). Subjects and
+    schedule entries are kept pre-serialized so response bodies are assembled by joining bytes.
+    """
+    version: int
+    subjects: Mapping[str, SubjectRead]
+    subject_json: Mapping[str, bytes]
+    schedule_json: Mapping[str, bytes]
+
+    def __contains__(self, subject_id: str) -> bool:
+        return subject_id in self.subjects
+
+    def subjects_body(self, subject_ids: Iterable[str]) -> bytes:
+        return b"[" + b",".join(self.subject_json[i] for i in subject_ids if i in self.subject_json) + b"]"
+
+    def schedule_body(self, subject_ids: Iterable[str]) -> bytes:
+        return b"[" + b",".join(self.schedule_json[i] for i in subject_ids if self.schedule_json.get(i)) + b"]"
+
+class CatalogService:
+    """
+    Holds the current Catalog for this worker. It is versioned by the "catalog" cache generation:
+    once a write calls AcademicService.invalidate_catalog(), the bump reaches every worker over
+    Redis pub/sub and the next read loads a new snapshot and swaps it in.
+    """
+    snapshot: Optional[Catalog] = None
+    _lock = asyncio.Lock()
+
+    @classmethod
+    async def load(cls, session: AsyncSession, version: Optional[int] = None) -> Catalog:
+        if session.info.get("replica"):
+            # The snapshot is kept until the next bump, so never build it from a lagging replica
+            async with async_session() as primary:
+                return await cls.load(primary, version)
+        if version is None:
+            version = (await cache.generations(["catalog"]))[0]
+
+        result = await session.execute(select(Subject).order_by(Subject.code))
+        subjects = {str(s.id): SubjectRead.model_validate(s) for s in result.scalars().all()}
+        result = await session.execute(select(Schedule).order_by(Schedule.day, Schedule.start_time))
+
+        schedules = {}
+        for s in result.scalars().all():
+            subject = subjects.get(str(s.subject_id))
+            if subject is None:
+                continue
+            schedules.setdefault(str(s.subject_id), []).append(orjson.dumps(ScheduleRead(
+                id=s.id,
+                day=s.day,
+                start_time=s.start_time,
+                end_time=s.end_time,
+                classroom=s.classroom,
+                subject_name=subject.name,
+                subject_code=subject.code
+            ).model_dump(mode='json')))
+
+        cls.snapshot = Catalog(
+            version=version,
+            subjects=MappingProxyType(subjects),
+            subject_json=MappingProxyType({i: orjson.dumps(s.model_dump(mode='json')) for i, s in subjects.items()}),
+            schedule_json=MappingProxyType({i: b",".join(entries) for i, entries in schedules.items()}),
+        )
+        return cls.snapshot
+
+    @classmethod
+    async def get(cls, session: AsyncSession, version: int, subject_ids: Iterable[str] = ()) -> Catalog:
+        """
+        The snapshot for generation `version`, knowing every id in `subject_ids`. Any other version
+        means a reload, not only a newer one: after Redis loses its data the counter starts over at 0,
+        and later bumps must still replace a snapshot built at a higher generation. An unknown id
+        means a subject was added without a catalog bump, so that also triggers a reload.
+        """
+        snapshot = cls.snapshot
+        if snapshot is not None and snapshot.version == version and all(i in snapshot for i in subject_ids):
+            return snapshot
+
+        async with cls._lock:
+            # Another request may have reloaded while we waited
+            current = cls.snapshot
+            if current is not None and current is not snapshot and current.version == version:
+                if all(i in current for i in subject_ids):
+                    return current
+            return await cls.load(session, version)
+
+catalog_service = CatalogService()
@@ -0,0 +1,220 @@
+import csv
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import orjson
+from pydantic import ValidationError
+from sqlmodel import select, func
+from sqlalchemy import Column, Integer, MetaData, String, Table, literal, or_
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from app.models.user import User
+from app.models.academic import Subject, Grade, Enrollment, dialect_insert, grade_aggregate_upsert
+from app.core.config import settings
+from app.core.exceptions import GradeImportError
+from app.schemas.academic import GradeImportRow, GradeImportResult
+from app.services.academic_service import academic_service
+
+CSV = "text/csv"
+NDJSON = "application/x-ndjson"
+FORMATS = (CSV, NDJSON)
+
+_grade = Grade.__table__
+
+# Per-connection staging table, loaded with COPY on PostgreSQL
+_staging = Table(
+    "grade_import_staging",
+    MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("id", _grade.c.id.type, nullable=False),
+    Column("username", String, nullable=False),
+    Column("subject_code", String, nullable=False),
+    Column("evaluation_name", _grade.c.evaluation_name.type, nullable=False),
+    Column("value", _grade.c.value.type, nullable=False),
+    Column("weight", _grade.c.weight.type, nullable=False),
+    Column("evaluation_date", _grade.c.evaluation_date.type),
+    prefixes=["TEMPORARY"],
+)
+_STAGING_COLUMNS = [c.name for c in _staging.columns]
+
+def _merged(*columns):
+    # Grades inserted by this import. The WHERE is for SQLite, which otherwise reads the ON CONFLICT
+    # of an INSERT ... SELECT ... JOIN as part of the join
+    return select(*columns).join(_staging, _grade.c.id == _staging.c.id).where(_grade.c.student_id.is_not(None))
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Split a byte stream into numbered, non-blank lines without buffering the whole body.
+    """
+    number, pending = 0, b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            number += 1
+            text = line.decode("utf-8-sig" if number == 1 else "utf-8").strip()
+            if text:
+                yield number, text
+    if pending.strip():
+        yield number + 1, pending.decode("utf-8-sig" if number == 0 else "utf-8").strip()
+
+async def _records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[Tuple[int, Any]]:
+    lines = _lines(chunks)
+    if content_type == NDJSON:
+        async for number, line in lines:
+            try:
+                yield number, orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield number, None
+        return
+
+    header = None
+    async for number, line in lines:
+        fields = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+        # Empty CSV cells mean "not given", so optional columns fall back to their defaults
+        yield number, {name: value for name, value in zip(header, fields) if value != ""}
+
+class GradeImportService:
+    @staticmethod
+    async def import_grades(session: AsyncSession, chunks: AsyncIterator[bytes], content_type: str) -> GradeImportResult:
+        """
+        Validate an uploaded batch row by row while it streams in, stage it in a temporary table
+        (COPY on PostgreSQL) and merge it into Grade with one INSERT ... SELECT that resolves
+        usernames and subject codes. All or nothing: any invalid or unresolvable row rejects the
+        batch. Grades already recorded for the same student, subject and evaluation are skipped, as are
+        repeats within the upload (the first one is kept).
+        """
+        connection = await session.connection()
+        await connection.run_sync(_staging.drop, checkfirst=True)
+        await connection.run_sync(_staging.create)
+
+        errors: List[Dict[str, Any]] = []
+        batch: List[tuple] = []
+        received = 0
+        async for line, record in _records(chunks, content_type):
+            error = None
+            if not isinstance(record, dict):
+                error = "not a JSON object"
+            else:
+                try:
+                    row = GradeImportRow.model_validate(record)
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            if error:
+                errors.append({"line": line, "error": error})
+                if len(errors) >= settings.GRADE_IMPORT_MAX_ERRORS:
+                    break
+                continue
+            received += 1
+            if errors:
+                # Keep validating to report every bad row, but nothing more will be saved
+                continue
+            batch.append((
+                line, uuid.uuid4(), row.username, row.subject_code, row.evaluation_name,
+                row.value, row.weight, row.evaluation_date,
+            ))
+            if len(batch) >= settings.GRADE_IMPORT_BATCH_SIZE:
+                await GradeImportService._stage(connection, batch)
+                batch = []
+
+        if not errors:
+            await GradeImportService._stage(connection, batch)
+            errors = await GradeImportService._unresolved(session)
+        if errors:
+            await session.rollback()
+            raise GradeImportError(errors)
+
+        inserted = await GradeImportService._merge(session)
+        students = await GradeImportService._merge_aggregates(session, connection)
+        await GradeImportService._merge_enrollments(session, connection)
+        await connection.run_sync(_staging.drop)
+        await session.commit()
+
+        await academic_service.invalidate(*students)
+        return GradeImportResult(received=received, inserted=inserted, skipped=received - inserted, students=len(students))
+
+    @staticmethod
+    async def _stage(connection: AsyncConnection, rows: List[tuple]):
+        if not rows:
+            return
+        if connection.dialect.driver == "asyncpg":
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(_staging.name, records=rows, columns=_STAGING_COLUMNS)
+        else:
+            await connection.execute(_staging.insert(), [dict(zip(_STAGING_COLUMNS, row)) for row in rows])
+
+    @staticmethod
+    async def _unresolved(session: AsyncSession) -> List[Dict[str, Any]]:
+        statement = (
+            select(_staging.c.line, _staging.c.username, _staging.c.subject_code, User.id, Subject.id)
+            .outerjoin(User, User.username == _staging.c.username)
+            .outerjoin(Subject, Subject.code == _staging.c.subject_code)
+            .where(or_(User.id.is_(None), Subject.id.is_(None)))
+            .order_by(_staging.c.line)
+            .limit(settings.GRADE_IMPORT_MAX_ERRORS)
+        )
+        result = await session.execute(statement)
+        return [
+            {"line": line, "error": f"unknown student {username}" if user_id is None else f"unknown subject {code}"}
+            for line, username, code, user_id, _ in result.all()
+        ]
+
+    @staticmethod
+    async def _merge(session: AsyncSession) -> int:
+        # Number the repeats of each (student, subject, evaluation) in upload order
+        staged = select(
+            _staging,
+            func.row_number().over(
+                partition_by=[_staging.c.username, _staging.c.subject_code, _staging.c.evaluation_name],
+                order_by=_staging.c.line,
+            ).label("repeat"),
+        ).subquery()
+        recorded = select(_grade.c.id).where(
+            _grade.c.student_id == User.id,
+            _grade.c.subject_id == Subject.id,
+            _grade.c.evaluation_name == staged.c.evaluation_name,
+        ).exists()
+        rows = (
+            select(
+                staged.c.id, staged.c.value, staged.c.weight, staged.c.evaluation_name,
+                staged.c.evaluation_date, User.id, Subject.id,
+            )
+            .join(User, User.username == staged.c.username)
+            .join(Subject, Subject.code == staged.c.subject_code)
+            .where(staged.c.repeat == 1, ~recorded)
+        )
+        result = await session.execute(_grade.insert().from_select(
+            ["id", "value", "weight", "evaluation_name", "evaluation_date", "student_id", "subject_id"], rows
+        ))
+        return result.rowcount
+
+    @staticmethod
+    async def _merge_aggregates(session: AsyncSession, connection: AsyncConnection) -> List[uuid.UUID]:
+        """
+        Add the merged grades to GradeAggregate (Core inserts skip the mapper events) and return
+        the students they belong to.
+        """
+        totals = _merged(
+            _grade.c.student_id,
+            _grade.c.subject_id,
+            func.sum(_grade.c.value * _grade.c.weight),
+            func.sum(_grade.c.weight),
+            func.count(),
+        ).group_by(_grade.c.student_id, _grade.c.subject_id)
+        await session.execute(grade_aggregate_upsert(connection, totals))
+
+        result = await session.execute(_merged(_grade.c.student_id).distinct())
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def _merge_enrollments(session: AsyncSession, connection: AsyncConnection):
+        """
+        Enroll students in the current term for the subjects they were just graded in, as the
+        Grade insert event does for ORM writes.
+        """
+        pairs = _merged(_grade.c.student_id, _grade.c.subject_id, literal(settings.CURRENT_TERM)).distinct()
+        statement = dialect_insert(connection)(Enrollment.__table__).from_select(["student_id", "subject_id", "term"], pairs)
+        await session.execute(statement.on_conflict_do_nothing())
+
+grade_import_service = GradeImportService()
@@ -1,17 +1,37 @@
 import uuid
-from typing import Optional
-from sqlmodel import select
+import orjson
+from typing import List, Optional
+from sqlmodel import select, col, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserCreate, UserUpdate, UserRead
-from app.core import security
-from app.core.exceptions import UserAlreadyExistsError
-from app.core.cache import cache
+from app.core.exceptions import UserAlreadyExistsError, UserNotFoundError
+from app.core.cache import cache, ABSENT
+from app.core.config import settings
+from app.core.hashing import hashing_pool
+from app.db.session import mark_written
 
 class UserService:
+    @staticmethod
+    def cache_keys(user: User) -> List[str]:
+        """
+        Every identity key cached for this user.
+        """
+        return [
+            f"user:id:{user.id}",
+            f"user:email:{user.email}",
+            f"user:username:{user.username}",
+            f"user:ident:{user.email}",
+            f"user:ident:{user.username}",
+            f"user:ver:{user.id}",
+            f"user:me:{user.id}",
+        ]
+
     @staticmethod
     async def get_by_id(session: AsyncSession, user_id: uuid.UUID) -> Optional[User]:
         key = f"user:id:{user_id}"
         cached_data = await cache.get(key)
+        if cached_data is ABSENT:
+            return None
         if cached_data:
             return User.model_validate(cached_data)
 
@@ -21,12 +41,27 @@ class UserService:
         
         if user:
             await cache.set(key, user.model_dump(mode='json'), ttl=300)
+        else:
+            await cache.set_absent(key)
         return user
 
+    @staticmethod
+    async def get_profile(session: AsyncSession, user_id: uuid.UUID) -> Optional[bytes]:
+        """
+        The /users/me response body, cached pre-serialized.
+        """
+        async def load():
+            user = await UserService.get_by_id(session, user_id)
+            return orjson.dumps(UserRead.model_validate(user).model_dump(mode='json')) if user else None
+
+        return await cache.get_or_set(f"user:me:{user_id}", load, ttl=300, raw=True)
+
     @staticmethod
     async def get_by_email(session: AsyncSession, email: str) -> Optional[User]:
         key = f"user:email:{email}"
         cached_data = await cache.get(key)
+        if cached_data is ABSENT:
+            return None
         if cached_data:
             return User.model_validate(cached_data)
 
@@ -36,12 +71,16 @@ class UserService:
         
         if user:
             await cache.set(key, user.model_dump(mode='json'), ttl=300)
+        else:
+            await cache.set_absent(key)
         return user
 
     @staticmethod
     async def get_by_username(session: AsyncSession, username: str) -> Optional[User]:
         key = f"user:username:{username}"
         cached_data = await cache.get(key)
+        if cached_data is ABSENT:
+            return None
         if cached_data:
             return User.model_validate(cached_data)
 
@@ -51,8 +90,76 @@ class UserService:
         
         if user:
             await cache.set(key, user.model_dump(mode='json'), ttl=300)
+        else:
+            await cache.set_absent(key)
         return user
 
+    @staticmethod
+    async def get_by_identifier(session: AsyncSession, identifier: str) -> Optional[User]:
+        """
+        Resolve an email or a username with a single mapping probe and at most one indexed query.
+        An email match wins over a username match, as in the previous email-then-username lookup.
+        """
+        key = f"user:ident:{identifier}"
+        cached_id = await cache.get(key)
+        if cached_id is ABSENT:
+            return None
+        if cached_id:
+            user = await UserService.get_by_id(session, uuid.UUID(cached_id))
+            if user and identifier in (user.email, user.username):
+                return user
+
+        statement = select(User).where(or_(User.email == identifier, User.username == identifier)).limit(2)
+        result = await session.execute(statement)
+        users = result.scalars().all()
+        user = next((u for u in users if u.email == identifier), users[0] if users else None)
+
+        if user:
+            await cache.set_many({
+                f"user:id:{user.id}": user.model_dump(mode='json'),
+                key: str(user.id),
+                f"user:ident:{user.email}": str(user.id),
+            }, ttl=300)
+        else:
+            await cache.set_absent(key)
+        return user
+
+    @staticmethod
+    async def get_token_version(session: AsyncSession, user_id: uuid.UUID) -> Optional[int]:
+        key = f"user:ver:{user_id}"
+        cached_data = await cache.get(key)
+        if cached_data is ABSENT:
+            return None
+        if cached_data is not None:
+            return cached_data
+
+        statement = select(User.token_version).where(User.id == user_id)
+        result = await session.execute(statement)
+        version = result.scalars().first()
+
+        if version is not None:
+            await cache.set(key, version, ttl=settings.TOKEN_VERSION_CACHE_TTL)
+        else:
+            await cache.set_absent(key)
+        return version
+
+    @staticmethod
+    async def warm(session: AsyncSession, user_ids: List[uuid.UUID]) -> int:
+        """
+        Cache the user rows and token versions of many users with one query and one pipelined write.
+        """
+        if not user_ids:
+            return 0
+        result = await session.execute(select(User).where(col(User.id).in_(user_ids)))
+        items, ttls = {}, {}
+        for user in result.scalars().all():
+            items[f"user:id:{user.id}"] = user.model_dump(mode='json')
+            ttls[f"user:id:{user.id}"] = 300
+            items[f"user:ver:{user.id}"] = user.token_version
+            ttls[f"user:ver:{user.id}"] = settings.TOKEN_VERSION_CACHE_TTL
+        await cache.set_many(items, ttl=ttls)
+        return len(items)
+
     @staticmethod
     async def create(session: AsyncSession, user_in: UserCreate) -> User:
         existing_email = await UserService.get_by_email(session, user_in.email)
@@ -63,30 +170,44 @@ class UserService:
         if existing_username:
             raise UserAlreadyExistsError(f"Username {user_in.username} already taken")
 
-        db_user = User.model_validate(user_in, update={"hashed_password": security.get_password_hash(user_in.password)})
+        db_user = User.model_validate(user_in, update={"hashed_password": await hashing_pool.hash(user_in.password)})
         session.add(db_user)
         await session.commit()
         await session.refresh(db_user)
+
+        # Clear "known absent" entries left by the duplicate checks and earlier failed logins
+        await cache.delete_many(UserService.cache_keys(db_user))
         return db_user
 
     @staticmethod
     async def update(session: AsyncSession, db_user: User, user_in: UserUpdate) -> User:
-        # Invalidate old cache entries
-        await cache.client.delete(f"user:email:{db_user.email}")
-        await cache.client.delete(f"user:username:{db_user.username}")
-        await cache.client.delete(f"user:id:{db_user.id}")
+        stale_keys = UserService.cache_keys(db_user)
+
+        # The caller's copy may come from the cache and be detached from this session
+        db_user = await session.get(User, db_user.id)
+        if not db_user:
+            raise UserNotFoundError()
 
         user_data = user_in.model_dump(exclude_unset=True)
         if "password" in user_data:
             password = user_data["password"]
-            hashed_password = security.get_password_hash(password)
+            hashed_password = await hashing_pool.hash(password)
             user_data["hashed_password"] = hashed_password
             del user_data["password"]
-            
+
+        # Outstanding tokens stop validating once the password changes or the user is deactivated
+        if "hashed_password" in user_data or user_data.get("is_active") is False:
+            user_data["token_version"] = db_user.token_version + 1
+
         db_user.sqlmodel_update(user_data)
         session.add(db_user)
         await session.commit()
         await session.refresh(db_user)
+
+        # Invalidate after commit so concurrent readers can't re-cache the old row (on every worker).
+        # A new email may also have been cached as absent.
+        await cache.delete_many(stale_keys + UserService.cache_keys(db_user))
+        await mark_written(db_user.id)
         return db_user
 
 user_service = UserService()
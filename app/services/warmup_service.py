@@ -0,0 +1,86 @@
+import asyncio
+import time
+import uuid
+from typing import Callable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.session import read_session, pool_stats
+from app.services.academic_service import academic_service
+from app.services.auth_service import ACTIVE_STUDENTS_KEY
+from app.services.user_service import user_service
+
+# Held while a warm-up runs, so only one worker (or the CLI) does it after a deploy
+WARMUP_LOCK = "warmup"
+WARMUP_LOCK_TIMEOUT = 15 * 60
+
+class WarmupService:
+    @staticmethod
+    async def recent_students(limit: Optional[int] = None) -> List[uuid.UUID]:
+        members = await cache.recent_members(ACTIVE_STUDENTS_KEY, settings.CACHE_WARMUP_WINDOW, limit)
+        return [uuid.UUID(member) for member in members]
+
+    @staticmethod
+    async def _wait_for_pool(session: AsyncSession):
+        # Live requests come first: hold off while the pool this batch reads from (a replica's or
+        # the primary's) is busy
+        while pool_stats(session.bind).get("saturation", 0.0) > settings.CACHE_WARMUP_MAX_SATURATION:
+            await asyncio.sleep(0.5)
+
+    @staticmethod
+    async def run(
+        limit: Optional[int] = None,
+        rate: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> dict:
+        """
+        Precompute the academic and identity cache entries of recently active students, most recent
+        first, in batches of set-based queries. Paced to `rate` students per second.
+        """
+        rate = rate or settings.CACHE_WARMUP_RATE
+        batch_size = batch_size or settings.CACHE_WARMUP_BATCH_SIZE
+        student_ids = await WarmupService.recent_students(limit)
+
+        started = time.monotonic()
+        entries = 0
+        for done in range(0, len(student_ids), batch_size):
+            batch = student_ids[done:done + batch_size]
+            async with read_session() as session:
+                await WarmupService._wait_for_pool(session)
+                entries += await academic_service.warm(session, batch)
+                entries += await user_service.warm(session, batch)
+            if progress:
+                progress(done + len(batch), len(student_ids))
+            # Sleep off whatever the batch finished ahead of schedule
+            ahead = (done + len(batch)) / rate - (time.monotonic() - started)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+
+        return {"students": len(student_ids), "entries": entries, "seconds": round(time.monotonic() - started, 2)}
+
+    @staticmethod
+    async def run_once(**kwargs) -> Optional[dict]:
+        """
+        `run` under the cross-worker warm-up lock; None when another process is already warming.
+        """
+        token = await cache.acquire_lock(WARMUP_LOCK, timeout=WARMUP_LOCK_TIMEOUT)
+        if not token:
+            return None
+        try:
+            return await WarmupService.run(**kwargs)
+        finally:
+            await cache.release_lock(WARMUP_LOCK, token)
+
+    @staticmethod
+    async def warm_on_startup():
+        try:
+            stats = await WarmupService.run_once()
+        except Exception as e:
+            # The cache fills on demand anyway; a failed warm-up must not take the worker down
+            print(f"⚠️ Cache warm-up failed: {e!r}")
+            return
+        if stats:
+            print(f"🔥 Cache warmed for {stats['students']} students ({stats['entries']} entries) in {stats['seconds']}s")
+
+warmup_service = WarmupService()
@@ -13,14 +13,10 @@ export default function Dashboard() {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const [subjectsRes, gradesRes, scheduleRes] = await Promise.all([
-                    api.get('/academic/subjects'),
-                    api.get('/academic/grades'),
-                    api.get('/academic/schedule')
-                ]);
-                setSubjects(subjectsRes.data);
-                setGrades(gradesRes.data);
-                setSchedule(scheduleRes.data);
+                const { data } = await api.get('/academic/overview');
+                setSubjects(data.subjects);
+                setGrades(data.grades);
+                setSchedule(data.schedule);
             } catch (error) {
                 console.error('Error fetching data:', error);
             } finally {
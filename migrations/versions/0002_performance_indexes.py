@@ -0,0 +1,47 @@
+"""Indexes for the hot read paths
+
+- schedule.subject_id: schedules of the enrolled subjects
+- grade (student_id, subject_id): enrollment (DISTINCT subject_id per student); replaces the
+  single-column student_id index, which is its prefix
+- grade (student_id, evaluation_date, id): keyset pages of a student's grade history; INCLUDEs the
+  listed columns on PostgreSQL for index-only pages (the option is ignored elsewhere)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from contextlib import contextmanager
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+HISTORY_INCLUDE = ["subject_id", "value", "weight", "evaluation_name"]
+
+@contextmanager
+def online():
+    # PostgreSQL builds the indexes CONCURRENTLY, which can't run inside a transaction
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            yield {"postgresql_concurrently": True}
+    else:
+        yield {}
+
+def upgrade():
+    with online() as options:
+        op.create_index("ix_schedule_subject_id", "schedule", ["subject_id"], if_not_exists=True, **options)
+        op.create_index("ix_grade_student_id_subject_id", "grade", ["student_id", "subject_id"], if_not_exists=True, **options)
+        op.drop_index("ix_grade_student_id", "grade", if_exists=True, **options)
+        op.create_index(
+            "ix_grade_student_id_evaluation_date_id", "grade", ["student_id", "evaluation_date", "id"],
+            postgresql_include=HISTORY_INCLUDE, if_not_exists=True, **options,
+        )
+
+def downgrade():
+    with online() as options:
+        op.drop_index("ix_grade_student_id_evaluation_date_id", "grade", **options)
+        op.create_index("ix_grade_student_id", "grade", ["student_id"], **options)
+        op.drop_index("ix_grade_student_id_subject_id", "grade", **options)
+        op.drop_index("ix_schedule_subject_id", "schedule", **options)
@@ -0,0 +1,38 @@
+"""Enrollment table, backfilled from the subjects students already have grades in
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.config import settings
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "enrollment",
+        sa.Column("student_id", sa.Uuid(), nullable=False),
+        sa.Column("subject_id", sa.Uuid(), nullable=False),
+        sa.Column("term", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["student_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["subject_id"], ["subject.id"]),
+        sa.PrimaryKeyConstraint("student_id", "subject_id", "term"),
+    )
+    op.create_index("ix_enrollment_subject_id_term", "enrollment", ["subject_id", "term"])
+
+    # Grades carry no term; existing enrollments are recorded under the current one
+    op.execute(
+        sa.text(
+            "INSERT INTO enrollment (student_id, subject_id, term) "
+            "SELECT DISTINCT student_id, subject_id, :term FROM grade"
+        ).bindparams(term=settings.CURRENT_TERM)
+    )
+
+def downgrade():
+    op.drop_index("ix_enrollment_subject_id_term", "enrollment")
+    op.drop_table("enrollment")
@@ -0,0 +1,142 @@
+"""
+Headless load-test runner around tests/performance/locustfile.py.
+
+    # Run one scenario and write a JSON report (percentiles per endpoint)
+    python scripts/load_test.py run WarmCacheStudent --users 200 --spawn-rate 20 --run-time 2m \
+        --out load-reports/warm.json
+
+    # Compare two reports; exits 1 when p95 (or the failure rate) regressed past the threshold
+    python scripts/load_test.py compare load-reports/baseline.json load-reports/warm.json --threshold 0.2
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+LOCUSTFILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "performance", "locustfile.py")
+SCENARIOS = ("WarmCacheStudent", "ColdCacheStudent", "LoginStorm", "ProfileUpdater")
+PERCENTILES = ("50%", "90%", "95%", "99%")
+
+def read_stats(path: str) -> dict:
+    """
+    Locust's <prefix>_stats.csv as {name: {requests, failures, rps, p50..p99, max}} (times in ms).
+    """
+    endpoints = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            name = row["Name"] if row["Type"] in ("", None) else f"{row['Type']} {row['Name']}"
+            endpoints[name] = {
+                "requests": int(row["Request Count"]),
+                "failures": int(row["Failure Count"]),
+                "rps": round(float(row["Requests/s"]), 2),
+                **{f"p{p.rstrip('%')}": float(row[p]) if row[p] not in ("N/A", "") else None for p in PERCENTILES},
+                "max": float(row["Max Response Time"]),
+            }
+    return endpoints
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "locust")
+        command = [
+            sys.executable, "-m", "locust", "-f", LOCUSTFILE, "--headless",
+            "--host", args.host, "--users", str(args.users), "--spawn-rate", str(args.spawn_rate),
+            "--run-time", args.run_time, "--csv", prefix, "--only-summary", args.scenario,
+        ]
+        print(f"🚦 {args.scenario}: {args.users} users for {args.run_time} against {args.host}")
+        # Locust exits 1 when any request failed; the report records failures, so keep going
+        code = subprocess.run(command).returncode
+        if not os.path.exists(prefix + "_stats.csv"):
+            print("❌ Locust produced no stats")
+            return code or 1
+        endpoints = read_stats(prefix + "_stats.csv")
+
+    report = {
+        "scenario": args.scenario,
+        "host": args.host,
+        "users": args.users,
+        "spawn_rate": args.spawn_rate,
+        "run_time": args.run_time,
+        "revision": git_revision(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "endpoints": endpoints,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    total = endpoints.get("Aggregated", {})
+    print(f"📄 Wrote {args.out}: {total.get('requests', 0)} requests, p95 {total.get('p95')} ms, {total.get('failures', 0)} failures")
+    return 0
+
+def failure_rate(stats: dict) -> float:
+    return stats["failures"] / stats["requests"] if stats["requests"] else 0.0
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["scenario"] != current["scenario"]:
+        print(f"⚠️ Comparing different scenarios: {baseline['scenario']} vs {current['scenario']}")
+
+    regressions = []
+    print(f"{'endpoint':<32} {'p50':>16} {'p95':>16} {'p99':>16} {'fail %':>14}")
+    for name, now in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            print(f"{name:<32} (new)")
+            continue
+        cells = []
+        for p in ("p50", "p95", "p99"):
+            cells.append(f"{before[p]}→{now[p]}" if before[p] is not None and now[p] is not None else "-")
+        print(f"{name:<32} {cells[0]:>16} {cells[1]:>16} {cells[2]:>16} {failure_rate(before):>6.1%}→{failure_rate(now):<6.1%}")
+
+        if before["p95"] and now["p95"] is not None and now["p95"] > before["p95"] * (1 + args.threshold):
+            regressions.append(f"{name}: p95 {before['p95']} → {now['p95']} ms")
+        if failure_rate(now) > failure_rate(before) + args.max_failure_increase:
+            regressions.append(f"{name}: failure rate {failure_rate(before):.1%} → {failure_rate(now):.1%}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"   -> {regression}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run a scenario headless and write a JSON report")
+    run_parser.add_argument("scenario", choices=SCENARIOS)
+    run_parser.add_argument("--host", default="http://localhost:8000")
+    run_parser.add_argument("--users", type=int, default=100)
+    run_parser.add_argument("--spawn-rate", type=float, default=10)
+    run_parser.add_argument("--run-time", default="1m")
+    run_parser.add_argument("--out", default=None, help="defaults to load-reports/<scenario>-<timestamp>.json")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 increase (0.2 = 20%%)")
+    compare_parser.add_argument("--max-failure-increase", type=float, default=0.01)
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    if args.command == "run" and args.out is None:
+        args.out = os.path.join("load-reports", f"{args.scenario}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
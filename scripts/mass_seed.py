@@ -6,157 +6,291 @@ import os
 sys.path.append(os.getcwd())
 
 import random
+import time as clock
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from datetime import datetime, time, timedelta
 from faker import Faker
-from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from app.models.user import User, Role
-from app.models.academic import Subject, Grade, Schedule
+from app.models.academic import Subject, Grade, Schedule, Enrollment
 from app.core import security
+from app.core.config import settings
+from app.db.session import run_migrations
+from app.services.academic_service import academic_service
+from scripts.seed_data import CREDENTIALS_PATH, STUDENT_PASSWORD, export_credentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-_DATABASE_URL = os.getenv("DATABASE_URL")
+_DATABASE_URL = os.getenv("DATABASE_URL") or settings.DATABASE_URL
 
-if _DATABASE_URL:
-    engine = create_async_engine(_DATABASE_URL, future=True)
-else:
-    from app.db.session import engine
+# Students are generated in fixed-size blocks, each from its own RNG, so a given --seed yields
+# the same rows whatever the number of workers
+BLOCK_SIZE = 1000
 
-fake = Faker()
+# Evaluation dates are spread back from a fixed day to keep runs reproducible
+_ANCHOR = datetime(2025, 7, 1, 9, 0)
 
-async def mass_seed_data(count: int = 2000, reset_db: bool = False):
-    print(f"🚀 Starting mass data seeding ({count} students)...")
-    
-    if reset_db:
-        print("🧹 Resetting database schema...")
-        async with engine.begin() as conn:
-            await conn.run_sync(SQLModel.metadata.drop_all)
-            await conn.run_sync(SQLModel.metadata.create_all)
+SUBJECT_NAMES = [
+    "Álgebra Lineal", "Cálculo I", "Cálculo II", "Física Mecánica",
+    "Física Electromagnetismo", "Programación I", "Programación II",
+    "Estructuras de Datos", "Bases de Datos", "Sistemas Operativos",
+    "Redes de Computadores", "Ingeniería de Software", "Inteligencia Artificial",
+    "Ética Profesional", "Gestión de Proyectos"
+]
+
+_USER_COLUMNS = [c.name for c in User.__table__.columns]
+_GRADE_COLUMNS = [c.name for c in Grade.__table__.columns]
+_ENROLLMENT_COLUMNS = [c.name for c in Enrollment.__table__.columns]
+
+def make_engine() -> AsyncEngine:
+    return create_async_engine(_DATABASE_URL, future=True)
 
+def name_pools(seed: int, size: int = 500) -> tuple:
+    """
+    First and last names drawn once from Faker; students combine them instead of calling Faker per row.
+    """
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [fake.first_name() for _ in range(size)], [fake.last_name() for _ in range(size)]
+
+def generate_block(block: int, count: int, seed: int, subject_ids: list, pools: tuple, password_hash: str) -> tuple:
+    """
+    Build one block of students, their enrollments and grades column by column. Returns
+    (users, enrollments, grades) as lists of row tuples in table column order.
+    """
+    rng = random.Random(seed * 1_000_003 + block)
+    first_names, last_names = pools
+    start = block * BLOCK_SIZE
+    size = min(BLOCK_SIZE, count - start)
+
+    ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(size)]
+    firsts = rng.choices(first_names, k=size)
+    lasts = rng.choices(last_names, k=size)
+    usernames = [f"{f}.{l}.{seed}.{start + i}".lower().replace(" ", "") for i, (f, l) in enumerate(zip(firsts, lasts))]
+    created = _ANCHOR
+    users = {
+        "id": ids,
+        "email": [f"{u}@ufro.cl" for u in usernames],
+        "username": usernames,
+        "full_name": [f"{f} {l}" for f, l in zip(firsts, lasts)],
+        "role": [Role.STUDENT.name] * size,
+        "is_active": [True] * size,
+        "hashed_password": [password_hash] * size,
+        "token_version": [0] * size,
+        "created_at": [created] * size,
+        "updated_at": [created] * size,
+    }
+
+    # Enrollment: 3-6 subjects per student, 2-4 evaluations per subject
+    enrolled_students, enrolled_subjects = [], []
+    grade_students, grade_subjects, grade_numbers = [], [], []
+    for student_id in ids:
+        for subject_id in rng.sample(subject_ids, rng.randint(3, 6)):
+            enrolled_students.append(student_id)
+            enrolled_subjects.append(subject_id)
+            evaluations = rng.randint(2, 4)
+            grade_students += [student_id] * evaluations
+            grade_subjects += [subject_id] * evaluations
+            grade_numbers += range(1, evaluations + 1)
+    enrollments = {
+        "student_id": enrolled_students,
+        "subject_id": enrolled_subjects,
+        "term": [settings.CURRENT_TERM] * len(enrolled_students),
+    }
+    total = len(grade_students)
+    grades = {
+        "id": [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(total)],
+        "value": [round(v, 1) for v in (rng.uniform(1.0, 7.0) for _ in range(total))],
+        "weight": [0.25] * total,
+        "evaluation_name": [f"Evaluation {n}" for n in grade_numbers],
+        "evaluation_date": [_ANCHOR - timedelta(days=d) for d in rng.choices(range(1, 101), k=total)],
+        "student_id": grade_students,
+        "subject_id": grade_subjects,
+    }
+
+    return (
+        list(zip(*(users[c] for c in _USER_COLUMNS))),
+        list(zip(*(enrollments[c] for c in _ENROLLMENT_COLUMNS))),
+        list(zip(*(grades[c] for c in _GRADE_COLUMNS))),
+    )
+
+async def load_rows(engine: AsyncEngine, table, columns: list, rows: list, batch_size: int = 5000):
+    async with engine.begin() as conn:
+        if conn.dialect.driver == "asyncpg":
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(table.name, records=rows, columns=columns)
+            return
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            await conn.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+
+async def seed_shard(shard: int, blocks: range, count: int, seed: int, subject_ids: list, password_hash: str) -> tuple:
+    engine = make_engine()
+    pools = name_pools(seed)
+    students = rows = 0
+    started = clock.perf_counter()
+    try:
+        for block in blocks:
+            users, enrollments, grades = generate_block(block, count, seed, subject_ids, pools, password_hash)
+            await load_rows(engine, User.__table__, _USER_COLUMNS, users)
+            await load_rows(engine, Enrollment.__table__, _ENROLLMENT_COLUMNS, enrollments)
+            await load_rows(engine, Grade.__table__, _GRADE_COLUMNS, grades)
+            students += len(users)
+            rows += len(users) + len(enrollments) + len(grades)
+            elapsed = clock.perf_counter() - started
+            print(f"   -> [shard {shard}] {students} students, {rows} rows ({rows / elapsed:,.0f} rows/s)")
+    finally:
+        await engine.dispose()
+    return students, rows
+
+def run_shard(*args) -> tuple:
+    return asyncio.run(seed_shard(*args))
+
+async def seed_catalog(engine: AsyncEngine, seed: int, password_hash: str) -> list:
+    """
+    Subjects, schedules and the well-known test student, created once through the ORM.
+    Existing subjects (same code) are reused.
+    """
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
     async_session = sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
     )
 
-    password_hash = security.get_password_hash("password123")
-    
     async with async_session() as session:
         print("📚 Generating subjects...")
-        subject_names = [
-            "Álgebra Lineal", "Cálculo I", "Cálculo II", "Física Mecánica", 
-            "Física Electromagnetismo", "Programación I", "Programación II", 
-            "Estructuras de Datos", "Bases de Datos", "Sistemas Operativos",
-            "Redes de Computadores", "Ingeniería de Software", "Inteligencia Artificial",
-            "Ética Profesional", "Gestión de Proyectos"
-        ]
-        
-        subjects = []
-        for name in subject_names:
-            code = f"{name[:3].upper()}{random.randint(100, 999)}"
-            subject = Subject(
-                code=code,
-                name=name,
-                credits=random.randint(2, 6),
-                description=fake.paragraph(nb_sentences=2)
-            )
-            session.add(subject)
-            subjects.append(subject)
-        
-        await session.commit()
-        for s in subjects: await session.refresh(s)
-        
+        codes = {f"{name[:3].upper()}{100 + i}": name for i, name in enumerate(SUBJECT_NAMES)}
+        result = await session.execute(select(Subject).where(Subject.code.in_(list(codes))))
+        subjects = {s.code: s for s in result.scalars().all()}
+        created = []
+        for code, name in codes.items():
+            if code not in subjects:
+                subjects[code] = Subject(
+                    code=code,
+                    name=name,
+                    credits=rng.randint(2, 6),
+                    description=fake.paragraph(nb_sentences=2)
+                )
+                created.append(subjects[code])
+        session.add_all(created)
+
         print("📅 Generating schedules...")
         days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
         classrooms = ["A-101", "A-102", "B-201", "B-205", "Lab-1", "Lab-Computacion"]
-        
-        for subject in subjects:
-            num_classes = random.randint(1, 2)
-            for _ in range(num_classes):
-                day = random.choice(days)
-                start_hour = random.randint(8, 17)
-                start_time = time(start_hour, 30)
-                end_time = time(start_hour + 1, 30)
-                
-                schedule = Schedule(
+        for subject in created:
+            for _ in range(rng.randint(1, 2)):
+                start_hour = rng.randint(8, 17)
+                session.add(Schedule(
                     subject_id=subject.id,
-                    day=day,
-                    start_time=start_time,
-                    end_time=end_time,
-                    classroom=random.choice(classrooms)
-                )
-                session.add(schedule)
+                    day=rng.choice(days),
+                    start_time=time(start_hour, 30),
+                    end_time=time(start_hour + 1, 30),
+                    classroom=rng.choice(classrooms)
+                ))
+
+        result = await session.execute(select(User).where(User.username == "student1"))
+        if not result.scalars().first():
+            test_student = User(
+                email="student1@ufro.cl",
+                username="student1",
+                full_name="Test Student",
+                hashed_password=password_hash,
+                role=Role.STUDENT
+            )
+            session.add(test_student)
+            # Enroll test_student in some subjects
+            for sub in rng.sample(list(subjects.values()), 3):
+                for i in range(2):
+                    session.add(Grade(
+                        student_id=test_student.id,
+                        subject_id=sub.id,
+                        value=6.0,
+                        weight=0.5,
+                        evaluation_name=f"Test Eval {i+1}",
+                        evaluation_date=_ANCHOR
+                    ))
         await session.commit()
+        return [s.id for s in subjects.values()]
 
-        print(f"👤 Generating {count} students and their grades...")
-        
-        test_student = User(
-            email="student1@ufro.cl",
-            username="student1",
-            full_name="Test Student",
-            hashed_password=password_hash,
-            role=Role.STUDENT
-        )
-        session.add(test_student)
-        await session.flush()
-        
-        # Enroll test_student in some subjects
-        for sub in random.sample(subjects, 3):
-            for i in range(2):
-                session.add(Grade(
-                    student_id=test_student.id,
-                    subject_id=sub.id,
-                    value=6.0,
-                    weight=0.5,
-                    evaluation_name=f"Test Eval {i+1}",
-                    evaluation_date=datetime.now()
-                ))
+async def mass_seed_data(count: int = 2000, reset_db: bool = False, workers: int = 1, seed: int = 42, credentials_path: str = CREDENTIALS_PATH):
+    print(f"🚀 Starting mass data seeding ({count} students, {workers} workers, seed {seed})...")
+    engine = make_engine()
 
-        chunk_size = 100
-        for i in range(0, count, chunk_size):
-            actual_chunk = min(chunk_size, count - i)
-            for _ in range(actual_chunk):
-                username = f"{fake.user_name()}{random.randint(1, 100000)}"
-                student = User(
-                    email=f"{username}@ufro.cl",
-                    username=username,
-                    full_name=fake.name(),
-                    hashed_password=password_hash,
-                    role=Role.STUDENT
-                )
-                session.add(student)
-                await session.flush() 
-                
-                enrolled_subjects = random.sample(subjects, random.randint(3, 6))
-                for sub in enrolled_subjects:
-                    for g_idx in range(random.randint(2, 4)):
-                        grade = Grade(
-                            student_id=student.id,
-                            subject_id=sub.id,
-                            value=round(random.uniform(1.0, 7.0), 1),
-                            weight=0.25,
-                            evaluation_name=f"Evaluation {g_idx + 1}",
-                            evaluation_date=datetime.now() - timedelta(days=random.randint(1, 100))
-                        )
-                        session.add(grade)
-            
-            await session.commit()
-            print(f"   -> Progress: {i + actual_chunk}/{count} students added.")
-
-    print(f"✅ Finished! Successfully added {count} students and academic data.")
+    if reset_db:
+        print("🧹 Resetting database schema...")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        async with engine.connect() as conn:
+            await conn.run_sync(run_migrations)
+
+    password_hash = security.get_password_hash(STUDENT_PASSWORD)
+    subject_ids = await seed_catalog(engine, seed, password_hash)
+
+    print(f"👤 Generating {count} students and their grades...")
+    started = clock.perf_counter()
+    blocks = range((count + BLOCK_SIZE - 1) // BLOCK_SIZE)
+    shards = [(shard, blocks[shard::workers], count, seed, subject_ids, password_hash) for shard in range(workers)]
+    if workers == 1:
+        totals = [await seed_shard(*shards[0])]
+    else:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            totals = await asyncio.gather(*(loop.run_in_executor(pool, run_shard, *args) for args in shards))
+    students = sum(t[0] for t in totals)
+    rows = sum(t[1] for t in totals)
+    elapsed = clock.perf_counter() - started
+    print(f"📦 Loaded {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+    # Bulk loads bypass the ORM events that maintain GradeAggregate
+    print("🧮 Rebuilding grade aggregates...")
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        await academic_service.rebuild_grade_aggregates(session)
+
+    exported = await export_credentials(engine, credentials_path)
+    print(f"🔑 Exported {exported} student logins to {credentials_path}")
+    await engine.dispose()
+
+    print(f"✅ Finished! Successfully added {students} students and academic data.")
 
 if __name__ == "__main__":
     count_to_seed = 2000
     reset_db = False
-    
+    workers = 1
+    seed = 42
+    credentials_path = CREDENTIALS_PATH
+
     if "--reset" in sys.argv:
         reset_db = True
         sys.argv.remove("--reset")
-        
+
+    if "--credentials" in sys.argv:
+        i = sys.argv.index("--credentials")
+        credentials_path = sys.argv[i + 1]
+        del sys.argv[i:i + 2]
+
+    for flag in ("--workers", "--seed"):
+        if flag in sys.argv:
+            i = sys.argv.index(flag)
+            value = int(sys.argv[i + 1])
+            del sys.argv[i:i + 2]
+            if flag == "--workers":
+                workers = max(1, value)
+            else:
+                seed = value
+
     if len(sys.argv) > 1:
         try:
             count_to_seed = int(sys.argv[1])
         except ValueError:
             pass
-            
-    asyncio.run(mass_seed_data(count_to_seed, reset_db))
 
+    asyncio.run(mass_seed_data(count_to_seed, reset_db, workers, seed, credentials_path))
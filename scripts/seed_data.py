@@ -1,4 +1,5 @@
 import asyncio
+import csv
 import sys
 import os
 from datetime import datetime, time, date
@@ -6,21 +7,45 @@ from datetime import datetime, time, date
 # Add the project root to the python path
 sys.path.append(os.getcwd())
 
+from sqlalchemy import text
 from sqlmodel import select, delete, SQLModel
 from app.db.session import engine, init_db
 from app.models.user import User, Role
-from app.models.academic import Subject, Grade, Schedule
+from app.models.academic import Subject, Grade, Schedule, Enrollment, GradeAggregate
 from app.core import security
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
+# Logins for the load test (tests/performance/locustfile.py); every seeded student shares one password
+CREDENTIALS_PATH = os.getenv("CREDENTIALS_PATH", "tests/performance/credentials.csv")
+STUDENT_PASSWORD = "password123"
+
+async def export_credentials(engine, path: str = CREDENTIALS_PATH) -> int:
+    """
+    Write every student's username and the seed password to a CSV, streaming the usernames.
+    """
+    count = 0
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            select(User.username).where(User.role == Role.STUDENT).order_by(User.username)
+            .execution_options(yield_per=10000)
+        )
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["username", "password"])
+            async for rows in result.partitions():
+                writer.writerows((username, STUDENT_PASSWORD) for username, in rows)
+                count += len(rows)
+    return count
+
 async def seed_data():
     print("🌱 Starting data seeding...")
     
     # Init DB (ensure tables exist and schema is updated)
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.drop_all)
-        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    await init_db()
 
     async_session = sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
@@ -29,6 +54,8 @@ async def seed_data():
     async with async_session() as session:
         # 1. Clean up existing data (Optional: Be careful in Prod)
         print("🧹 Cleaning old data...")
+        await session.execute(delete(GradeAggregate))
+        await session.execute(delete(Enrollment))
         await session.execute(delete(Grade))
         await session.execute(delete(Schedule))
         await session.execute(delete(Subject))
@@ -37,7 +64,7 @@ async def seed_data():
         
         # 2. Create Users
         print("👤 Creating users...")
-        student_password = security.get_password_hash("password123")
+        student_password = security.get_password_hash(STUDENT_PASSWORD)
         
         student1 = User(
             email="student@ufro.cl",
@@ -105,7 +132,16 @@ async def seed_data():
         session.add_all(schedules)
         await session.commit()
 
-        # 5. Create Grades (Only for Student 1 for now)
+        # 5. Enroll students (student 1 is also enrolled by the grades below)
+        print("🗂️ Enrolling students...")
+        session.add_all([
+            Enrollment(student_id=student1.id, subject_id=fisica.id),
+            Enrollment(student_id=student2.id, subject_id=algebra.id),
+            Enrollment(student_id=student2.id, subject_id=fisica.id),
+        ])
+        await session.commit()
+
+        # 6. Create Grades (Only for Student 1 for now)
         print("📝 Assigning grades...")
         grades = [
             # Algebra Grades
@@ -119,6 +155,8 @@ async def seed_data():
         session.add_all(grades)
         await session.commit()
         
+    exported = await export_credentials(engine)
+    print(f"🔑 Exported {exported} student logins to {CREDENTIALS_PATH}")
     print("✅ Seed data created successfully!")
 
 if __name__ == "__main__":
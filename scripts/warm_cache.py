@@ -0,0 +1,48 @@
+"""
+Warm the cache for recently active students, e.g. at term start or right after a deploy.
+Run from the project root with DATABASE_URL and REDIS_URL pointing at the live services:
+
+    python scripts/warm_cache.py --limit 20000 --rate 300
+
+Takes the same lock as CACHE_WARMUP_ON_STARTUP, so it never runs alongside a worker's warm-up.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the project root to the python path
+sys.path.append(os.getcwd())
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.session import engine, replicas
+from app.services.warmup_service import warmup_service
+
+def report(done: int, total: int):
+    print(f"   -> {done}/{total} students", flush=True)
+
+async def main(args) -> int:
+    await cache.connect()
+    try:
+        kwargs = {"limit": args.limit, "rate": args.rate, "batch_size": args.batch_size, "progress": report}
+        print(f"🔥 Warming students active in the last {settings.CACHE_WARMUP_WINDOW // 3600}h")
+        stats = await (warmup_service.run(**kwargs) if args.force else warmup_service.run_once(**kwargs))
+    finally:
+        await cache.close()
+        await replicas.dispose()
+        await engine.dispose()
+
+    if stats is None:
+        print("⏳ Another warm-up holds the lock; use --force to run anyway")
+        return 1
+    print(f"✅ Warmed {stats['students']} students ({stats['entries']} entries) in {stats['seconds']}s")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="most recently active students only")
+    parser.add_argument("--rate", type=float, default=None, help="students per second (default CACHE_WARMUP_RATE)")
+    parser.add_argument("--batch-size", type=int, default=None, help="students per query batch (default CACHE_WARMUP_BATCH_SIZE)")
+    parser.add_argument("--force", action="store_true", help="skip the warm-up lock")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,9 +1,10 @@
 import pytest
 from httpx import AsyncClient
 from app.models.user import User, Role
-from app.models.academic import Subject, Grade, Schedule
+from app.models.academic import Subject, Grade, Schedule, Enrollment
+import json
 import uuid
-from datetime import time
+from datetime import datetime, time
 from app.core import security
 
 @pytest.mark.asyncio
@@ -70,3 +71,244 @@ async def test_read_my_academic_data(client: AsyncClient, db_session):
     schedules = response.json()
     assert len(schedules) == 1
     assert schedules[0]["subject_name"] == "Computer Science 101"
+
+    response = await client.get("/api/v1/academic/overview", headers=headers)
+    assert response.status_code == 200
+    overview = response.json()
+    assert [s["code"] for s in overview["subjects"]] == ["INF-123"]
+    assert [g["value"] for g in overview["grades"]] == [5.5]
+    assert [s["subject_name"] for s in overview["schedule"]] == ["Computer Science 101"]
+
+    # An unchanged body is revalidated with its ETag instead of being sent again
+    etag = response.headers["etag"]
+    response = await client.get("/api/v1/academic/overview", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    response = await client.get("/api/v1/academic/overview", headers={**headers, "If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+
+@pytest.mark.asyncio
+async def test_read_my_grade_summary(client: AsyncClient, db_session):
+    student_id = uuid.uuid4()
+    db_session.add(User(
+        id=student_id,
+        email="summary@example.com",
+        username="summary",
+        full_name="Summary Student",
+        hashed_password=security.get_password_hash("password123"),
+        role=Role.STUDENT,
+        is_active=True
+    ))
+    math_id, physics_id = uuid.uuid4(), uuid.uuid4()
+    db_session.add(Subject(id=math_id, code="MAT-1", name="Math", credits=6))
+    db_session.add(Subject(id=physics_id, code="PHY-1", name="Physics", credits=3))
+    grades = [
+        Grade(student_id=student_id, subject_id=math_id, value=4.0, weight=0.25, evaluation_name="Quiz"),
+        Grade(student_id=student_id, subject_id=math_id, value=6.0, weight=0.75, evaluation_name="Exam"),
+        Grade(student_id=student_id, subject_id=physics_id, value=3.0, weight=0.5, evaluation_name="Lab"),
+    ]
+    db_session.add_all(grades)
+    await db_session.commit()
+
+    # Aggregates follow later writes: the lab grade is corrected, a mistaken grade is removed
+    grades[2].value = 7.0
+    extra = Grade(student_id=student_id, subject_id=physics_id, value=1.0, weight=0.5, evaluation_name="Typo")
+    db_session.add(extra)
+    await db_session.commit()
+    await db_session.delete(extra)
+    await db_session.commit()
+
+    login_response = await client.post("/api/v1/login/access-token", data={"username": "summary", "password": "password123"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    response = await client.get("/api/v1/academic/summary", headers=headers)
+    assert response.status_code == 200
+    summary = response.json()
+    averages = {s["subject_code"]: (s["average"], s["grade_count"]) for s in summary["subjects"]}
+    assert averages == {"MAT-1": (5.5, 2), "PHY-1": (7.0, 1)}
+    assert summary["gpa"] == 6.0
+
+@pytest.mark.asyncio
+async def test_read_my_grade_history(client: AsyncClient, db_session):
+    student_id = uuid.uuid4()
+    db_session.add(User(
+        id=student_id,
+        email="history@example.com",
+        username="history",
+        full_name="History Student",
+        hashed_password=security.get_password_hash("password123"),
+        role=Role.STUDENT,
+        is_active=True
+    ))
+    subject_id = uuid.uuid4()
+    db_session.add(Subject(id=subject_id, code="HIS-1", name="History", credits=4))
+    names = ["Quiz 1", "Quiz 2", "Exam", "Project", "Bonus"]
+    dates = [datetime(2024, 3, 1), datetime(2024, 3, 1), datetime(2024, 4, 15), datetime(2024, 5, 30), None]
+    db_session.add_all([
+        Grade(student_id=student_id, subject_id=subject_id, value=5.0, evaluation_name=n, evaluation_date=d)
+        for n, d in zip(names, dates)
+    ])
+    await db_session.commit()
+
+    login_response = await client.post("/api/v1/login/access-token", data={"username": "history", "password": "password123"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/academic/grades/history", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    history = [g for p in pages for g in p]
+    assert [g["evaluation_name"] for g in history][2:] == ["Exam", "Project", "Bonus"]
+    assert sorted(g["evaluation_name"] for g in history[:2]) == ["Quiz 1", "Quiz 2"]
+    assert history[-1]["evaluation_date"] is None
+
+    response = await client.get("/api/v1/academic/grades/history/stream", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert [g["id"] for g in streamed] == [g["id"] for g in history]
+
+    response = await client.get("/api/v1/academic/grades/history", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_admin_grade_import(client: AsyncClient, db_session):
+    db_session.add(User(
+        email="admin@example.com",
+        username="importer",
+        full_name="Admin User",
+        hashed_password=security.get_password_hash("password123"),
+        role=Role.ADMIN,
+        is_active=True
+    ))
+    student_id = uuid.uuid4()
+    db_session.add(User(
+        id=student_id,
+        email="imported@example.com",
+        username="imported",
+        full_name="Imported Student",
+        hashed_password=security.get_password_hash("password123"),
+        role=Role.STUDENT,
+        is_active=True
+    ))
+    db_session.add(Subject(code="IMP-1", name="Imports", credits=2))
+    await db_session.commit()
+
+    async def login(username):
+        response = await client.post("/api/v1/login/access-token", data={"username": username, "password": "password123"})
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    admin_headers = await login("importer")
+    csv_body = (
+        "username,subject_code,evaluation_name,value,weight,evaluation_date\n"
+        "imported,IMP-1,Exam 1,6.0,0.5,2024-05-01T10:00:00\n"
+        "imported,IMP-1,Exam 2,4.0,0.5,\n"
+    )
+    response = await client.post(
+        "/api/v1/admin/grades/import", content=csv_body, headers={**admin_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"received": 2, "inserted": 2, "skipped": 0, "students": 1}
+
+    # Re-sent rows are skipped; one bad row rejects the whole batch
+    ndjson_body = (
+        '{"username": "imported", "subject_code": "IMP-1", "evaluation_name": "Exam 2", "value": 4.0}\n'
+        '{"username": "imported", "subject_code": "IMP-1", "evaluation_name": "Exam 3", "value": 7.0}\n'
+    )
+    ndjson_headers = {**admin_headers, "Content-Type": "application/x-ndjson"}
+    response = await client.post("/api/v1/admin/grades/import", content=ndjson_body, headers=ndjson_headers)
+    assert response.json() == {"received": 2, "inserted": 1, "skipped": 1, "students": 1}
+
+    bad_body = ndjson_body + '{"username": "nobody", "subject_code": "IMP-1", "evaluation_name": "X", "value": 1.0}\n{"value": "high"}\n'
+    response = await client.post("/api/v1/admin/grades/import", content=bad_body, headers=ndjson_headers)
+    assert response.status_code == 422
+    assert [e["line"] for e in response.json()["errors"]] == [4]
+
+    bad_body = ndjson_body.replace("Exam 3", "Exam 4") + '{"username": "nobody", "subject_code": "IMP-1", "evaluation_name": "X", "value": 1.0}\n'
+    response = await client.post("/api/v1/admin/grades/import", content=bad_body, headers=ndjson_headers)
+    assert response.status_code == 422
+    assert response.json()["errors"] == [{"line": 3, "error": "unknown student nobody"}]
+
+    student_headers = await login("imported")
+    response = await client.get("/api/v1/academic/summary", headers=student_headers)
+    assert response.json()["subjects"][0]["average"] == 6.0
+    assert response.json()["subjects"][0]["grade_count"] == 3
+
+    response = await client.post("/api/v1/admin/grades/import", content=csv_body, headers={**student_headers, "Content-Type": "text/csv"})
+    assert response.status_code == 403
+
+    # Repeats within one upload are recorded once, the first one winning
+    repeated_body = (
+        '{"username": "imported", "subject_code": "IMP-1", "evaluation_name": "Exam 5", "value": 2.0}\n'
+        '{"username": "imported", "subject_code": "IMP-1", "evaluation_name": "Exam 5", "value": 3.0}\n'
+    )
+    response = await client.post("/api/v1/admin/grades/import", content=repeated_body, headers=ndjson_headers)
+    assert response.json() == {"received": 2, "inserted": 1, "skipped": 1, "students": 1}
+    grades = (await client.get("/api/v1/academic/grades", headers=student_headers)).json()
+    assert [g["value"] for g in grades if g["evaluation_name"] == "Exam 5"] == [2.0]
+
+@pytest.mark.asyncio
+async def test_enrolled_subjects_without_grades(client: AsyncClient, db_session):
+    student_id = uuid.uuid4()
+    db_session.add(User(
+        id=student_id,
+        email="freshman@example.com",
+        username="freshman",
+        full_name="New Student",
+        hashed_password=security.get_password_hash("password123"),
+        role=Role.STUDENT,
+        is_active=True
+    ))
+    subject_id = uuid.uuid4()
+    db_session.add(Subject(id=subject_id, code="NEW-1", name="Orientation", credits=1))
+    db_session.add(Schedule(subject_id=subject_id, day="Friday", start_time=time(9, 0), end_time=time(10, 0), classroom="C-1"))
+    db_session.add(Enrollment(student_id=student_id, subject_id=subject_id))
+    await db_session.commit()
+
+    login_response = await client.post("/api/v1/login/access-token", data={"username": "freshman", "password": "password123"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    response = await client.get("/api/v1/academic/overview", headers=headers)
+    overview = response.json()
+    assert [s["code"] for s in overview["subjects"]] == ["NEW-1"]
+    assert [s["classroom"] for s in overview["schedule"]] == ["C-1"]
+    assert overview["grades"] == []
+
+@pytest.mark.asyncio
+async def test_subject_retaken_in_another_term_is_listed_once(client: AsyncClient, db_session):
+    student_id = uuid.uuid4()
+    db_session.add(User(
+        id=student_id,
+        email="repeater@example.com",
+        username="repeater",
+        full_name="Repeating Student",
+        hashed_password=security.get_password_hash("password123"),
+        role=Role.STUDENT,
+        is_active=True
+    ))
+    subject_id = uuid.uuid4()
+    db_session.add(Subject(id=subject_id, code="REP-1", name="Calculus", credits=6))
+    db_session.add(Schedule(subject_id=subject_id, day="Tuesday", start_time=time(8, 0), end_time=time(10, 0), classroom="D-2"))
+    db_session.add(Enrollment(student_id=student_id, subject_id=subject_id, term="2025-2"))
+    db_session.add(Enrollment(student_id=student_id, subject_id=subject_id, term="2026-1"))
+    await db_session.commit()
+
+    login_response = await client.post("/api/v1/login/access-token", data={"username": "repeater", "password": "password123"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    response = await client.get("/api/v1/academic/subjects", headers=headers)
+    assert [s["code"] for s in response.json()] == ["REP-1"]
+    response = await client.get("/api/v1/academic/schedule", headers=headers)
+    assert [s["classroom"] for s in response.json()] == ["D-2"]
+    overview = (await client.get("/api/v1/academic/overview", headers=headers)).json()
+    assert [s["code"] for s in overview["subjects"]] == ["REP-1"]
+    assert len(overview["schedule"]) == 1
@@ -45,3 +45,20 @@ async def test_login_invalid_credentials(client: AsyncClient):
     assert response.status_code == 400
     assert response.json()["detail"] == "Incorrect email or password"
 
+@pytest.mark.asyncio
+async def test_login_with_email_or_username(client: AsyncClient, db_session):
+    db_session.add(User(
+        id=uuid.uuid4(),
+        email="ident@example.com",
+        username="identuser",
+        full_name="Ident User",
+        hashed_password=security.get_password_hash("identpassword"),
+        role=Role.STUDENT,
+        is_active=True
+    ))
+    await db_session.commit()
+
+    for identifier in ("ident@example.com", "identuser"):
+        response = await client.post("/api/v1/login/access-token", data={"username": identifier, "password": "identpassword"})
+        assert response.status_code == 200
+        assert "access_token" in response.json()
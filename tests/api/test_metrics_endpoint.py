@@ -0,0 +1,17 @@
+from httpx import AsyncClient
+
+async def test_metrics_endpoint_reports_route_latency(client: AsyncClient):
+    await client.get("/api/v1/health/")
+    await client.get("/api/v1/no-such-route")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health/",status="200"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}' in body
+    assert "# TYPE cache_lookups_total counter" in body
+    assert "# TYPE db_query_duration_seconds histogram" in body
+    assert "# TYPE db_pool_checkout_duration_seconds histogram" in body
+    assert 'db_pool_checked_out{pool="primary"} 0' in body
+    assert 'db_pool_overflow{pool="primary"} 0' in body
@@ -0,0 +1,53 @@
+import logging
+import uuid
+from httpx import AsyncClient, ASGITransport
+from app.api.middleware import ServerTimingMiddleware
+from app.core import security, timing
+from app.core.timing import RequestTimings, normalize
+from app.models.user import User, Role
+
+def test_normalize_collapses_parameters():
+    assert normalize("SELECT * FROM grade WHERE id IN ($1, $2, $3)") == normalize("SELECT * FROM grade WHERE id IN ($1)")
+    assert normalize("SELECT a FROM t WHERE id = ?\n  AND b = ?") == "SELECT a FROM t WHERE id = ? AND b = ?"
+
+def test_repeated_selects_are_reported():
+    timings = RequestTimings()
+    for _ in range(6):
+        timings.statements["SELECT name FROM subject WHERE subject.id = ?"] += 1
+    timings.statements["UPDATE user SET full_name = ? WHERE id = ?"] += 10
+    assert timings.repeated_statements(5) == [("SELECT name FROM subject WHERE subject.id = ?", 6)]
+    assert timings.repeated_statements(7) == []
+
+async def test_server_timing_header(client: AsyncClient, db_session):
+    user = User(
+        id=uuid.uuid4(),
+        email="timing@example.com",
+        username="timinguser",
+        full_name="Timing User",
+        hashed_password=security.get_password_hash("timing_password"),
+        role=Role.STUDENT,
+    )
+    db_session.add(user)
+    await db_session.commit()
+
+    response = await client.post("/api/v1/login/access-token", data={"username": "timinguser", "password": "timing_password"})
+    header = response.headers["server-timing"]
+    assert header.startswith("db;dur=")
+    assert 'desc="0 queries"' not in header
+    assert "hash;dur=" in header
+    assert "app;dur=" in header
+
+async def test_n_plus_one_is_logged(caplog):
+    async def endpoint(scope, receive, send):
+        for n in range(6):
+            timing.record_sql(f"SELECT id FROM grade WHERE student_id = ${n + 1}", 0.001)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = ServerTimingMiddleware(endpoint)
+    with caplog.at_level(logging.WARNING, logger="app.core.timing"):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/grades")
+
+    assert 'db;dur=6.0;desc="6 queries"' in response.headers["server-timing"]
+    assert "Possible N+1: GET /grades ran 6 similar queries" in caplog.text
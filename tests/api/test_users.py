@@ -21,6 +21,24 @@ async def test_create_user(client: AsyncClient):
     assert data["username"] == user_data["username"]
     assert "id" in data
 
+@pytest.mark.asyncio
+async def test_signup_cannot_choose_role(client: AsyncClient, db_session):
+    user_data = {
+        "email": "sneaky@example.com",
+        "username": "sneaky",
+        "password": "sneakypassword",
+        "full_name": "Sneaky User",
+        "role": "admin",
+        "is_active": False,
+    }
+    response = await client.post("/api/v1/users/", json=user_data)
+
+    assert response.status_code == 200
+    assert response.json()["role"] == Role.STUDENT.value
+    user = await db_session.get(User, uuid.UUID(response.json()["id"]))
+    assert user.role == Role.STUDENT
+    assert user.is_active
+
 @pytest.mark.asyncio
 async def test_read_user_me(client: AsyncClient, db_session):
     test_user = User(
@@ -45,6 +63,12 @@ async def test_read_user_me(client: AsyncClient, db_session):
     assert data["username"] == "meuser"
     assert data["email"] == "me@example.com"
 
+    response = await client.get(
+        "/api/v1/users/me",
+        headers={"Authorization": f"Bearer {token}", "If-None-Match": f'"other", W/{response.headers["etag"]}'},
+    )
+    assert response.status_code == 304
+
 @pytest.mark.asyncio
 async def test_update_user_me(client: AsyncClient, db_session):
     test_user = User(
@@ -69,4 +93,36 @@ async def test_update_user_me(client: AsyncClient, db_session):
     data = response.json()
     assert data["full_name"] == "Updated Name"
     
-   
\ No newline at end of file
+   
+@pytest.mark.asyncio
+async def test_password_change_revokes_existing_tokens(client: AsyncClient, db_session):
+    test_user = User(
+        id=uuid.uuid4(),
+        email="revoke@example.com",
+        username="revokeuser",
+        full_name="Revoke User",
+        hashed_password=security.get_password_hash("old_password"),
+        role=Role.STUDENT,
+        is_active=True
+    )
+    db_session.add(test_user)
+    await db_session.commit()
+
+    login_response = await client.post("/api/v1/login/access-token", data={"username": "revokeuser", "password": "old_password"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    response = await client.get("/api/v1/academic/grades", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.patch("/api/v1/users/me", json={"password": "new_password"}, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/academic/grades", headers=headers)
+    assert response.status_code == 400
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+
+    login_response = await client.post("/api/v1/login/access-token", data={"username": "revokeuser", "password": "new_password"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    response = await client.get("/api/v1/academic/grades", headers=headers)
+    assert response.status_code == 200
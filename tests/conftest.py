@@ -8,7 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from app.main import app as fastapi_app
-from app.db.session import get_session
+from app.db.session import get_session, instrument
+from app.api.deps import get_read_session
 from app.core.cache import cache
 from unittest.mock import AsyncMock
 from httpx import AsyncClient, ASGITransport
@@ -16,6 +17,7 @@ from httpx import AsyncClient, ASGITransport
 TEST_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 engine_test = create_async_engine(TEST_SQLALCHEMY_DATABASE_URL, future=True)
+instrument(engine_test.sync_engine)
 
 async_session_test = sessionmaker(
     engine_test, class_=AsyncSession, expire_on_commit=False
@@ -42,6 +44,7 @@ async def override_get_session() -> AsyncSession:
         yield session
 
 fastapi_app.dependency_overrides[get_session] = override_get_session
+fastapi_app.dependency_overrides[get_read_session] = override_get_session
 
 @pytest.fixture(autouse=True)
 async def mock_redis():
@@ -0,0 +1,13 @@
+import fakeredis
+import pytest
+from app.core.cache import CacheManager
+
+@pytest.fixture
+async def redis_cache():
+    CacheManager.client = fakeredis.FakeAsyncRedis()
+    CacheManager.local.clear()
+    CacheManager.l1_hits = CacheManager.l2_hits = CacheManager.misses = 0
+    yield CacheManager
+    await CacheManager.client.flushall()
+    CacheManager.client = None
+    CacheManager.local.clear()
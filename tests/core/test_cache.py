@@ -0,0 +1,188 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock
+import pytest
+from app.core.config import settings
+from app.core.cache import CacheManager, LocalCache, INVALIDATION_CHANNEL, ABSENT
+
+def test_local_cache_evicts_least_recently_used():
+    local = LocalCache(maxsize=2, ttl=30)
+    local.set("a", 1)
+    local.set("b", 2)
+    local.get("a")
+    local.set("c", 3)
+    assert local.get("a") == 1
+    assert local.get("b") is None
+    assert local.get("c") == 3
+
+def test_local_cache_expires_entries():
+    local = LocalCache(maxsize=10, ttl=30)
+    local.set("a", 1, ttl=0.0001)
+    local.set("b", 2, ttl=0)
+    time.sleep(0.001)
+    assert local.get("a") is None
+    assert local.get("b") is None
+    assert len(local) == 0
+
+async def test_get_is_served_from_l1_after_first_read(redis_cache):
+    await redis_cache.client.set("user:id:1", json.dumps({"id": 1}), ex=300)
+
+    assert await redis_cache.get("user:id:1") == {"id": 1}
+    await redis_cache.client.delete("user:id:1")
+    assert await redis_cache.get("user:id:1") == {"id": 1}
+
+    stats = redis_cache.stats()
+    assert stats["l2"]["hits"] == 1
+    assert stats["l1"]["hits"] == 1
+    assert stats["l1"]["hit_ratio"] == 0.5
+
+async def test_delete_publishes_invalidation_to_other_workers(redis_cache):
+    pubsub = redis_cache.client.pubsub()
+    await pubsub.subscribe(INVALIDATION_CHANNEL)
+    await pubsub.get_message(timeout=1)
+
+    await redis_cache.set("user:id:1", {"id": 1})
+    await redis_cache.delete("user:id:1")
+    assert await redis_cache.get("user:id:1") is None
+
+    message = await pubsub.get_message(timeout=1)
+    assert json.loads(message["data"])["keys"] == ["user:id:1"]
+    await pubsub.aclose()
+
+    # A message from another worker evicts our L1 copy
+    redis_cache.local.set("user:id:2", {"id": 2})
+    redis_cache.apply_invalidation(json.dumps({"origin": "other-worker", "keys": ["user:id:2"]}))
+    assert redis_cache.local.get("user:id:2") is None
+
+async def test_get_or_set_coalesces_concurrent_misses(redis_cache, monkeypatch):
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    # Callers on the same worker share the in-process load instead of polling Redis for it
+    wait_for = AsyncMock(side_effect=AssertionError("polled Redis for a load running on this worker"))
+    monkeypatch.setattr(redis_cache, "_wait_for", wait_for)
+    results = await asyncio.gather(*[redis_cache.get_or_set("grades:1", load) for _ in range(50)])
+    assert results == [[1, 2, 3]] * 50
+    assert calls == 1
+    wait_for.assert_not_called()
+    assert await redis_cache.client.get("lock:grades:1") is None
+
+async def test_cancelled_leader_does_not_cancel_followers(redis_cache):
+    release = asyncio.Event()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return ["loaded"]
+
+    leader = asyncio.create_task(redis_cache.get_or_set("grades:4", load))
+    await asyncio.sleep(0.01)
+    followers = [asyncio.create_task(redis_cache.get_or_set("grades:4", load)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    # e.g. the leader's client disconnected
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*followers) == [["loaded"]] * 3
+    assert leader.cancelled()
+    assert calls == 1
+    assert "grades:4" not in redis_cache._inflight
+    assert await redis_cache.client.get("lock:grades:4") is None
+
+async def test_get_or_set_waits_for_loader_on_another_worker(redis_cache):
+    await redis_cache.client.set("lock:grades:2", "other-worker", px=5000)
+
+    async def other_worker_fills():
+        await asyncio.sleep(0.1)
+        await redis_cache.client.set("grades:2", json.dumps(["remote"]), ex=300)
+
+    async def load():
+        raise AssertionError("lock holder should have loaded the value")
+
+    filler = asyncio.create_task(other_worker_fills())
+    assert await redis_cache.get_or_set("grades:2", load) == ["remote"]
+    await filler
+
+async def test_get_or_set_serves_stale_value_while_one_request_refreshes(redis_cache):
+    redis_cache.local.set("grades:3", ["old"], ttl=30, stale_at=time.monotonic() - 1)
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return ["new"]
+
+    refresher = asyncio.create_task(redis_cache.get_or_set("grades:3", load))
+    await asyncio.sleep(0.01)
+    assert await redis_cache.get_or_set("grades:3", load) == ["old"]
+
+    release.set()
+    assert await refresher == ["new"]
+    assert await redis_cache.get_or_set("grades:3", load) == ["new"]
+
+async def test_absent_entries_are_distinguishable_and_overwritten_by_writes(redis_cache):
+    await redis_cache.set_absent("user:email:nobody@example.com")
+    assert await redis_cache.get("user:email:nobody@example.com") is ABSENT
+    redis_cache.local.clear()
+    assert await redis_cache.get("user:email:nobody@example.com") is ABSENT
+    assert 0 < await redis_cache.client.ttl("user:email:nobody@example.com") <= settings.CACHE_NEGATIVE_TTL
+
+    await redis_cache.set("user:email:nobody@example.com", {"id": 1})
+    assert await redis_cache.get("user:email:nobody@example.com") == {"id": 1}
+
+async def test_get_or_set_caches_empty_results_with_negative_ttl(redis_cache):
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return []
+
+    assert await redis_cache.get_or_set("grades:4", load, ttl=3600) == []
+    assert await redis_cache.get_or_set("grades:4", load, ttl=3600) == []
+    assert calls == 1
+    assert await redis_cache.client.ttl("grades:4") <= settings.CACHE_NEGATIVE_TTL + settings.CACHE_STALE_TTL
+
+async def test_batched_set_get_and_delete(redis_cache):
+    await redis_cache.set_many({"user:id:1": {"id": 1}, "user:ver:1": 3}, ttl={"user:id:1": 300, "user:ver:1": 3600})
+    assert 3000 < await redis_cache.client.ttl("user:ver:1") <= 3600
+
+    redis_cache.local.clear()
+    assert await redis_cache.get_many(["user:id:1", "user:ver:1", "user:id:2"]) == [{"id": 1}, 3, None]
+    assert redis_cache.stats()["l2"]["hits"] == 2
+
+    await redis_cache.delete_many(["user:id:1", "user:ver:1"])
+    assert await redis_cache.get_many(["user:id:1", "user:ver:1"]) == [None, None]
+    assert await redis_cache.client.exists("user:id:1", "user:ver:1") == 0
+
+async def test_raw_entries_round_trip_as_bytes(redis_cache):
+    async def load():
+        return b'[{"id":1}]'
+
+    assert await redis_cache.get_or_set("grades:5", load, raw=True) == b'[{"id":1}]'
+    redis_cache.local.clear()
+    assert await redis_cache.get_many(["grades:5"], raw=True) == [b'[{"id":1}]']
+
+async def test_bump_moves_derived_keys_to_a_new_generation(redis_cache):
+    assert await redis_cache.generations(["student:1", "catalog"]) == [0, 0]
+    old_key = redis_cache.versioned("grades:1", [0, 0])
+    await redis_cache.store(old_key, b"[1]", ttl=300, raw=True)
+
+    await redis_cache.bump("student:1")
+    generations = await redis_cache.generations(["student:1", "catalog"])
+    assert generations == [1, 0]
+    assert redis_cache.versioned("grades:1", generations) != old_key
+
+    # Another worker's bump evicts the generation we hold in L1
+    await redis_cache.client.incr("gen:catalog")
+    redis_cache.apply_invalidation(json.dumps({"origin": "other-worker", "keys": ["gen:catalog"]}))
+    assert await redis_cache.generations(["student:1", "catalog"]) == [1, 1]
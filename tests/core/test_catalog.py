@@ -0,0 +1,49 @@
+from app.models.academic import Subject
+from app.services.academic_service import academic_service
+from app.services.catalog_service import catalog_service
+
+async def test_catalog_snapshot_is_swapped_on_bump(redis_cache, db_session):
+    subject = Subject(code="CAT101", name="Catalogs", credits=3)
+    db_session.add(subject)
+    await db_session.commit()
+
+    snapshot = await catalog_service.get(db_session, 0, [str(subject.id)])
+    assert snapshot.subjects[str(subject.id)].name == "Catalogs"
+
+    # Without a bump the snapshot is served as is, with no reload
+    subject.name = "Catalogs II"
+    await db_session.commit()
+    assert await catalog_service.get(db_session, 0, [str(subject.id)]) is snapshot
+
+    await academic_service.invalidate_catalog()
+    version = (await redis_cache.generations(["catalog"]))[0]
+    swapped = await catalog_service.get(db_session, version)
+    assert swapped.version == version
+    assert swapped.subjects[str(subject.id)].name == "Catalogs II"
+    assert snapshot.subjects[str(subject.id)].name == "Catalogs"
+
+    # A subject the snapshot doesn't know yet triggers a reload on its own
+    added = Subject(code="CAT102", name="More Catalogs", credits=2)
+    db_session.add(added)
+    await db_session.commit()
+    reloaded = await catalog_service.get(db_session, version, [str(added.id)])
+    assert str(added.id) in reloaded
+
+async def test_catalog_reloads_after_redis_loses_its_generation(redis_cache, db_session):
+    subject = Subject(code="CAT201", name="Old", credits=3)
+    db_session.add(subject)
+    await db_session.commit()
+    for _ in range(3):
+        await academic_service.invalidate_catalog()
+    version = (await redis_cache.generations(["catalog"]))[0]
+    assert (await catalog_service.get(db_session, version)).version == 3
+
+    # A Redis restart resets the counter; the next bump must still replace the snapshot
+    await redis_cache.client.flushall()
+    redis_cache.local.clear()
+    subject.name = "New"
+    await db_session.commit()
+    await academic_service.invalidate_catalog()
+    version = (await redis_cache.generations(["catalog"]))[0]
+    assert version == 1
+    assert (await catalog_service.get(db_session, version)).subjects[str(subject.id)].name == "New"
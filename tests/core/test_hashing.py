@@ -0,0 +1,24 @@
+import pytest
+from app.core import security
+from app.core.exceptions import HashingPoolBusyError
+from app.core.hashing import HashingPool
+
+async def test_hash_and_verify_run_in_pool():
+    pool = HashingPool(workers=1, max_pending=4)
+    try:
+        hashed = await pool.hash("secret")
+        assert security.verify_password("secret", hashed)
+        assert await pool.verify("secret", hashed)
+        assert not await pool.verify("wrong", hashed)
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["hash_time_avg"] > 0
+
+async def test_saturated_pool_fails_fast():
+    pool = HashingPool(workers=1, max_pending=0)
+    with pytest.raises(HashingPoolBusyError):
+        await pool.hash("secret")
+    assert pool.stats()["rejected"] == 1
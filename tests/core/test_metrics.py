@@ -0,0 +1,37 @@
+from app.core.metrics import CACHE_LOOKUPS, Counter, Histogram, Registry
+
+def test_render_prometheus_text():
+    registry = Registry()
+    lookups = registry.register(Counter("lookups_total", "Lookups.", ("family", "result")))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+
+    lookups.inc("user", "hit")
+    lookups.inc("user", "hit")
+    lookups.inc("grades", "miss")
+    latency.observe(0.1, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(3.0, "/a")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE lookups_total counter" in lines
+    assert 'lookups_total{family="user",result="hit"} 2' in lines
+    assert 'lookups_total{family="grades",result="miss"} 1' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.6' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+async def test_cache_lookups_are_counted_per_family(redis_cache):
+    before = {result: CACHE_LOOKUPS.value("metrics", result) for result in ("l1_hit", "l2_hit", "miss")}
+
+    await redis_cache.get("metrics:a")
+    await redis_cache.set("metrics:a", {"a": 1})
+    await redis_cache.get("metrics:a")
+    redis_cache.local.clear()
+    await redis_cache.get("metrics:a")
+
+    assert CACHE_LOOKUPS.value("metrics", "miss") == before["miss"] + 1
+    assert CACHE_LOOKUPS.value("metrics", "l1_hit") == before["l1_hit"] + 1
+    assert CACHE_LOOKUPS.value("metrics", "l2_hit") == before["l2_hit"] + 1
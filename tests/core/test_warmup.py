@@ -0,0 +1,84 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from app.core import timing
+from app.models.user import User, Role
+from app.models.academic import Subject, Grade, Enrollment
+from app.services.academic_service import academic_service
+from app.services.auth_service import ACTIVE_STUDENTS_KEY
+from app.services import warmup_service as warmup_module
+from app.services.warmup_service import warmup_service
+
+async def test_recent_members_are_most_recent_first_within_window(redis_cache):
+    await redis_cache.client.zadd(ACTIVE_STUDENTS_KEY, {"idle": 1.0})
+    await redis_cache.record_activity(ACTIVE_STUDENTS_KEY, "first", window=60)
+    await redis_cache.record_activity(ACTIVE_STUDENTS_KEY, "second", window=60)
+
+    assert await redis_cache.recent_members(ACTIVE_STUDENTS_KEY, window=60) == ["second", "first"]
+    assert await redis_cache.recent_members(ACTIVE_STUDENTS_KEY, window=60, limit=1) == ["second"]
+    # Members outside the window are pruned on write
+    assert await redis_cache.client.zscore(ACTIVE_STUDENTS_KEY, "idle") is None
+
+async def test_warmup_serves_reads_without_queries(redis_cache, db_session, monkeypatch):
+    subject = Subject(code="WRM101", name="Warm-up", credits=4)
+    students = [
+        User(email=f"warm{i}@ufro.cl", username=f"warm{i}", full_name=f"Warm {i}", hashed_password="x", role=Role.STUDENT)
+        for i in range(3)
+    ]
+    db_session.add_all([subject, *students])
+    await db_session.flush()
+    for student in students:
+        db_session.add(Enrollment(student_id=student.id, subject_id=subject.id, term="2025-1"))
+        db_session.add(Grade(student_id=student.id, subject_id=subject.id, value=5.5, weight=0.5,
+                             evaluation_name="Test 1", evaluation_date=datetime(2025, 4, 1)))
+    await db_session.commit()
+    ids = [student.id for student in students]
+    await academic_service.rebuild_grade_aggregates(db_session, ids)
+
+    expected = {}
+    for student_id in ids:
+        expected[student_id] = (
+            await academic_service.get_student_summary(db_session, student_id),
+            await academic_service.get_student_grades(db_session, student_id),
+        )
+    await redis_cache.client.flushall()
+    redis_cache.local.clear()
+
+    @asynccontextmanager
+    async def read_session():
+        yield db_session
+    monkeypatch.setattr(warmup_module, "read_session", read_session)
+    for student_id in ids:
+        await redis_cache.record_activity(ACTIVE_STUDENTS_KEY, str(student_id), window=60)
+
+    progress = []
+    stats = await warmup_service.run_once(batch_size=2, progress=lambda done, total: progress.append(done))
+    assert stats["students"] == 3
+    assert progress == [2, 3]
+
+    # Only the L2 entries written by the warm-up are left to serve from
+    redis_cache.local.clear()
+    timings = timing.start()
+    for student_id in ids:
+        summary = await academic_service.get_student_summary(db_session, student_id)
+        grades = await academic_service.get_student_grades(db_session, student_id)
+        assert (summary, grades) == expected[student_id]
+    assert timings.db_count == 0
+
+async def test_warmup_waits_on_the_pool_it_reads_from(monkeypatch):
+    class Session:
+        bind = object()
+
+    readings = iter([0.9, 0.9, 0.1])
+    checked = []
+    def pool_stats(bind=None):
+        checked.append(bind)
+        return {"saturation": next(readings)}
+    sleeps = []
+    async def sleep(seconds):
+        sleeps.append(seconds)
+    monkeypatch.setattr(warmup_module, "pool_stats", pool_stats)
+    monkeypatch.setattr(warmup_module.asyncio, "sleep", sleep)
+
+    await warmup_service._wait_for_pool(Session())
+    assert checked == [Session.bind] * 3
+    assert len(sleeps) == 2
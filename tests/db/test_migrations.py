@@ -0,0 +1,123 @@
+import uuid
+from datetime import datetime
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, Float, ForeignKey, Integer, MetaData, String, Table, Time, Uuid, inspect, text,
+)
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from app.db.session import ALEMBIC_INI, run_migrations
+
+def _schema_diff(connection):
+    return compare_metadata(MigrationContext.configure(connection), SQLModel.metadata)
+
+def _indexes(connection) -> dict:
+    inspector = inspect(connection)
+    return {table: sorted(i["name"] for i in inspector.get_indexes(table)) for table in inspector.get_table_names()}
+
+def _downgrade(connection, revision: str):
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    command.downgrade(config, revision)
+
+async def test_downgrade_restores_the_baseline_indexes():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.connect() as conn:
+        await conn.run_sync(run_migrations, "0001")
+        baseline = await conn.run_sync(_indexes)
+        await conn.run_sync(run_migrations)
+        await conn.run_sync(_downgrade, "0001")
+        assert await conn.run_sync(_indexes) == baseline
+    await engine.dispose()
+
+async def test_migrations_match_models():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.connect() as conn:
+        await conn.run_sync(run_migrations)
+        assert await conn.run_sync(_schema_diff) == []
+    await engine.dispose()
+
+def _baseline_metadata() -> MetaData:
+    # The tables create_all built at the commit before migrations existed
+    metadata = MetaData()
+    Table(
+        "subject", metadata,
+        Column("code", String, nullable=False, index=True, unique=True),
+        Column("name", String, nullable=False),
+        Column("credits", Integer, nullable=False),
+        Column("description", String),
+        Column("id", Uuid, primary_key=True),
+    )
+    Table(
+        "user", metadata,
+        Column("email", String, nullable=False, index=True, unique=True),
+        Column("username", String, nullable=False, index=True, unique=True),
+        Column("full_name", String, nullable=False),
+        Column("role", Enum("STUDENT", "ADMIN", name="role"), nullable=False),
+        Column("is_active", Boolean, nullable=False),
+        Column("id", Uuid, primary_key=True),
+        Column("hashed_password", String, nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Column("updated_at", DateTime, nullable=False),
+    )
+    Table(
+        "grade", metadata,
+        Column("value", Float, nullable=False),
+        Column("weight", Float, nullable=False),
+        Column("evaluation_name", String, nullable=False),
+        Column("evaluation_date", DateTime),
+        Column("id", Uuid, primary_key=True),
+        Column("student_id", Uuid, ForeignKey("user.id"), nullable=False, index=True),
+        Column("subject_id", Uuid, ForeignKey("subject.id"), nullable=False, index=True),
+    )
+    Table(
+        "schedule", metadata,
+        Column("day", String, nullable=False),
+        Column("start_time", Time, nullable=False),
+        Column("end_time", Time, nullable=False),
+        Column("classroom", String, nullable=False),
+        Column("id", Uuid, primary_key=True),
+        Column("subject_id", Uuid, ForeignKey("subject.id"), nullable=False),
+    )
+    return metadata
+
+async def test_schema_from_create_all_is_adopted_as_baseline_and_upgraded():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.connect() as conn:
+        baseline = _baseline_metadata()
+        await conn.run_sync(baseline.create_all)
+        student_id, subject_id = uuid.uuid4(), uuid.uuid4()
+        await conn.execute(baseline.tables["user"].insert(), [{
+            "id": student_id, "email": "old@ufro.cl", "username": "old", "full_name": "Old Student",
+            "hashed_password": "x", "role": "STUDENT", "is_active": True,
+            "created_at": datetime(2025, 1, 1), "updated_at": datetime(2025, 1, 1),
+        }])
+        await conn.execute(baseline.tables["subject"].insert(), [{"id": subject_id, "code": "OLD-1", "name": "Old", "credits": 3}])
+        await conn.execute(baseline.tables["grade"].insert(), [
+            {"id": uuid.uuid4(), "student_id": student_id, "subject_id": subject_id, "value": value,
+             "weight": weight, "evaluation_name": f"Exam {value}"}
+            for value, weight in ((4.0, 0.25), (6.0, 0.75))
+        ])
+        await conn.commit()
+
+        await conn.run_sync(run_migrations)
+        head = ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_current_head()
+        assert (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar() == head
+        assert await conn.run_sync(_schema_diff) == []
+        indexes = await conn.run_sync(lambda c: {i["name"] for i in inspect(c).get_indexes("grade")})
+        assert "ix_grade_student_id_evaluation_date_id" in indexes
+        assert "ix_grade_student_id" not in indexes
+        # Existing users keep token version 0, so tokens issued before the upgrade stay valid
+        assert (await conn.execute(text("SELECT token_version FROM user"))).scalar() == 0
+        # Grades recorded before the upgrade are aggregated, so summaries aren't empty afterwards
+        aggregates = (await conn.execute(text("SELECT weighted_sum, weight_total, grade_count FROM gradeaggregate"))).all()
+        assert [tuple(row) for row in aggregates] == [(5.5, 1.0, 2)]
+        # Enrollment is backfilled once per (student, subject) from existing grades
+        enrollments = (await conn.execute(text("SELECT student_id, subject_id FROM enrollment"))).all()
+        assert len(enrollments) == 1
+    await engine.dispose()
@@ -0,0 +1,127 @@
+"""
+Run EXPLAIN on every statement the read paths issue, against a migrated and seeded database,
+and fail when one of the hot tables is read with a full scan.
+
+SQLite in memory by default. Set EXPLAIN_DATABASE_URL to a disposable PostgreSQL database
+(postgresql+asyncpg://...) to check real plans there; seeding is rolled back afterwards.
+"""
+import os
+import random
+import uuid
+from datetime import datetime, time, timedelta
+import orjson
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.db.session import run_migrations
+from app.models.user import User, Role
+from app.models.academic import Subject, Grade, Schedule, Enrollment
+from app.services.academic_service import academic_service
+from app.services.catalog_service import catalog_service
+from app.services.user_service import user_service
+
+HOT_TABLES = {"user", "grade", "gradeaggregate", "schedule", "enrollment"}
+
+def _seed(rng: random.Random, students: int = 300, subjects: int = 300):
+    subject_rows = [
+        {"id": uuid.uuid4(), "code": f"SUB-{i}", "name": f"Subject {i}", "credits": rng.randint(2, 6)}
+        for i in range(subjects)
+    ]
+    schedule_rows = [
+        {"id": uuid.uuid4(), "subject_id": s["id"], "day": "Monday", "start_time": time(8 + i, 30),
+         "end_time": time(9 + i, 30), "classroom": "A-101"}
+        for s in subject_rows for i in range(2)
+    ]
+    user_rows, enrollment_rows, grade_rows = [], [], []
+    for n in range(students):
+        student_id = uuid.uuid4()
+        user_rows.append({
+            "id": student_id, "email": f"s{n}@ufro.cl", "username": f"s{n}", "full_name": f"Student {n}",
+            "hashed_password": "x", "role": Role.STUDENT, "is_active": True, "token_version": 0,
+            "created_at": datetime(2025, 1, 1), "updated_at": datetime(2025, 1, 1),
+        })
+        for subject in rng.sample(subject_rows, 5):
+            enrollment_rows.append({"student_id": student_id, "subject_id": subject["id"], "term": "2025-1"})
+            for e in range(4):
+                grade_rows.append({
+                    "id": uuid.uuid4(), "student_id": student_id, "subject_id": subject["id"],
+                    "value": rng.uniform(1, 7), "weight": 0.25, "evaluation_name": f"Eval {e}",
+                    "evaluation_date": datetime(2025, 3, 1) + timedelta(days=rng.randint(0, 120)),
+                })
+    return subject_rows, schedule_rows, user_rows, enrollment_rows, grade_rows
+
+def _full_scans(dialect: str, plan) -> set:
+    if dialect == "sqlite":
+        # "SCAN grade" reads the whole table; "SEARCH grade USING INDEX ..." is a range lookup
+        return {row[3].split()[1].strip('"') for row in plan if row[3].startswith("SCAN ")} & HOT_TABLES
+
+    scans, nodes = set(), [plan[0][0][0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in HOT_TABLES:
+            scans.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+async def test_read_paths_use_indexes():
+    url = os.getenv("EXPLAIN_DATABASE_URL", "sqlite+aiosqlite://")
+    engine = create_async_engine(url, poolclass=StaticPool)
+    async with engine.connect() as conn:
+        await conn.run_sync(run_migrations)
+        transaction = await conn.begin()
+        dialect = conn.dialect.name
+
+        subjects, schedules, users, enrollments, grades = _seed(random.Random(17))
+        await conn.execute(Subject.__table__.insert(), subjects)
+        await conn.execute(Schedule.__table__.insert(), schedules)
+        await conn.execute(User.__table__.insert(), users)
+        await conn.execute(Enrollment.__table__.insert(), enrollments)
+        await conn.execute(Grade.__table__.insert(), grades)
+        await conn.execute(text("ANALYZE"))
+
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+        # Reading the whole catalog into the snapshot is a full scan by design, once per worker
+        await catalog_service.load(session, version=0)
+
+        captured = []
+        def capture(connection, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+        event.listen(conn.sync_connection, "before_cursor_execute", capture)
+
+        student_id, username = users[7]["id"], users[7]["username"]
+        await academic_service.rebuild_grade_aggregates(session, [student_id])
+        await academic_service.get_student_subjects(session, student_id)
+        await academic_service.get_student_grades(session, student_id)
+        await academic_service.get_student_schedule(session, student_id)
+        await academic_service.get_student_overview(session, student_id)
+        await academic_service.get_student_summary(session, student_id)
+        page = orjson.loads(await academic_service.get_student_grade_page(session, student_id, limit=5))
+        await academic_service.get_student_grade_page(session, student_id, cursor=page["next_cursor"], limit=5)
+        async for _ in academic_service.stream_student_grades(session, student_id):
+            pass
+        await user_service.get_by_id(session, student_id)
+        await user_service.get_by_identifier(session, username)
+        await user_service.get_token_version(session, student_id)
+        # Warm-up batches read the same tables with IN lists
+        batch = [user["id"] for user in users[7:27]]
+        await academic_service.warm(session, batch)
+        await user_service.warm(session, batch)
+        event.remove(conn.sync_connection, "before_cursor_execute", capture)
+        assert len(captured) >= 12
+
+        explain = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN (FORMAT JSON) "
+        if dialect == "postgresql":
+            # With sequential scans priced out, any left in a plan had no usable index
+            await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        regressions = {}
+        for statement, parameters in captured:
+            plan = (await conn.exec_driver_sql(explain + statement, parameters)).all()
+            scans = _full_scans(dialect, plan)
+            if scans:
+                regressions[" ".join(statement.split())] = sorted(scans)
+
+        await transaction.rollback()
+    await engine.dispose()
+    assert regressions == {}
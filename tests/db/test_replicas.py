@@ -0,0 +1,80 @@
+import uuid
+import fakeredis
+import orjson
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.cache import CacheManager, INVALIDATION_CHANNEL, cache
+from app.db import session as db_session_module
+from app.db.session import ReplicaSet, engine, mark_written, read_session
+
+@pytest.fixture
+async def replica_set(monkeypatch):
+    # Real cache reads for the read-your-writes check, not the suite-wide mock
+    monkeypatch.delattr(cache, "get", raising=False)
+    CacheManager.client = fakeredis.FakeAsyncRedis()
+    replica_set = ReplicaSet(["sqlite+aiosqlite://", "sqlite+aiosqlite:////nonexistent/dir/replica.db"])
+    monkeypatch.setattr(db_session_module, "replicas", replica_set)
+    yield replica_set
+    await replica_set.dispose()
+    await CacheManager.client.flushall()
+    CacheManager.client = None
+    CacheManager.local.clear()
+
+def test_pick_rotates_and_skips_replicas_in_cooldown():
+    replica_set = ReplicaSet(["sqlite+aiosqlite://", "sqlite+aiosqlite://"])
+    first, second = replica_set.replicas
+    assert {replica_set.pick(), replica_set.pick()} == {first, second}
+
+    replica_set.mark_down(first)
+    assert [replica_set.pick() for _ in range(3)] == [second] * 3
+    replica_set.mark_down(second)
+    assert replica_set.pick() is None
+
+    first.down_until = 0.0
+    assert replica_set.pick() is first
+
+async def test_user_reads_own_writes_from_primary(replica_set):
+    user_id = uuid.uuid4()
+    async with read_session(user_id) as session:
+        assert session.info.get("replica")
+
+    pubsub = CacheManager.client.pubsub()
+    await pubsub.subscribe(INVALIDATION_CHANNEL)
+    await mark_written(user_id)
+    async with read_session(user_id) as session:
+        assert session.bind is engine
+    # Other workers are told to drop the "no recent write" they may hold in L1
+    messages = [await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1) for _ in range(2)]
+    assert [orjson.loads(m["data"])["keys"] for m in messages if m] == [[f"rw:{user_id}"]]
+    await pubsub.aclose()
+    async with read_session(uuid.uuid4()) as session:
+        assert session.info.get("replica")
+
+async def test_no_recent_write_is_remembered_briefly(replica_set, monkeypatch):
+    user_id = uuid.uuid4()
+    async with read_session(user_id):
+        pass
+    # The miss is kept in L1, so the next reads don't go to Redis
+    monkeypatch.setattr(CacheManager.client, "pipeline", None)
+    for _ in range(3):
+        async with read_session(user_id) as session:
+            assert session.info.get("replica")
+
+async def test_failing_replica_falls_back_to_primary(replica_set, monkeypatch):
+    primary = create_async_engine("sqlite+aiosqlite://")
+    monkeypatch.setattr(db_session_module, "engine", primary)
+    healthy, broken = replica_set.replicas
+    binds = []
+    for _ in range(2):
+        async with read_session() as session:
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+            binds.append(session.bind)
+
+    assert sorted(binds, key=id) == sorted([healthy.engine, primary], key=id)
+    assert broken.failures == 1 and not broken.healthy
+    assert healthy.healthy
+    for _ in range(3):
+        async with read_session() as session:
+            assert session.bind is healthy.engine
+    await primary.dispose()
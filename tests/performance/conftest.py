@@ -0,0 +1,153 @@
+"""
+Service-layer micro-benchmarks. Skipped unless BENCHMARK=1:
+
+    BENCHMARK=1 pytest tests/performance                  # compare against baseline.json
+    BENCHMARK=1 BENCHMARK_SAVE=1 pytest tests/performance # record a new baseline
+
+Timings are stored relative to a fixed CPU-bound calibration workload, timed between the rounds
+of each benchmark, so a baseline recorded on one machine still means something on another.
+A benchmark fails when its 25th percentile is more than BENCHMARK_THRESHOLD (default 0.3, i.e.
+30% slower) above the baseline. The low percentile is compared rather than the median because
+interference from the rest of the machine only ever adds time, and mostly to the slower samples.
+"""
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+import fakeredis
+import orjson
+import pytest
+from app.core.cache import CacheManager, cache
+
+ENABLED = os.getenv("BENCHMARK") == "1"
+SAVE = os.getenv("BENCHMARK_SAVE") == "1"
+THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", "0.3"))
+BASELINE = Path(__file__).with_name("baseline.json")
+ATTEMPTS = 3
+
+if not ENABLED:
+    collect_ignore_glob = ["test_*.py"]
+
+_results: Dict[str, dict] = {}
+
+_PAYLOAD = [{"id": i, "name": f"subject {i}", "value": i * 0.5} for i in range(200)]
+
+def _calibration_sample() -> float:
+    """
+    Fastest of a few runs of a fixed serialize/sort workload: the unit benchmarks are stored in.
+    Taken between benchmark rounds, so both see the same load on the machine.
+    """
+    fastest = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        sorted(orjson.loads(orjson.dumps(_PAYLOAD)), key=lambda row: row["name"])
+        fastest = min(fastest, time.perf_counter() - started)
+    return fastest
+
+@pytest.fixture(autouse=True)
+async def mock_redis():
+    """
+    Overrides the suite-wide mock: benchmarks run against a real cache on fakeredis.
+    """
+    for name in ("connect", "close", "get", "set"):
+        cache.__dict__.pop(name, None)
+    CacheManager.client = fakeredis.FakeAsyncRedis()
+    CacheManager.local.clear()
+    yield
+    await CacheManager.client.flushall()
+    CacheManager.client = None
+    CacheManager.local.clear()
+
+async def _measure(fn: Callable[[], Awaitable], setup: Optional[Callable[[], Awaitable]], rounds: int, warmup: int, number: int) -> dict:
+    for _ in range(warmup):
+        if setup:
+            await setup()
+        await fn()
+
+    samples, calibrations = [], []
+    for _ in range(rounds):
+        if setup:
+            await setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        samples.append((time.perf_counter() - started) / number)
+        calibrations.append(_calibration_sample())
+
+    samples.sort()
+    calibration = sorted(calibrations)[len(calibrations) // 4]
+    p25 = samples[len(samples) // 4]
+    return {
+        "p25": p25,
+        "median": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+        "relative": p25 / calibration,
+    }
+
+@pytest.fixture
+def bench(request):
+    """
+    `await bench(fn, setup=None, rounds=200, number=1)` times `fn` (an async callable) over `rounds`
+    samples after a few warm-up calls, running `setup` untimed before each one, then checks the 25th
+    percentile against the stored baseline. Each sample is the mean of `number` calls in a row: a
+    call of a few microseconds needs a fixed number in the hundreds, or timer overhead and the odd
+    interruption decide its percentiles. A sample with a setup is always a single call. A benchmark over the threshold is measured again (up to
+    ATTEMPTS times) before it fails, so a burst of load on the machine doesn't fail it but a real
+    regression does.
+    With BENCHMARK_SAVE, the middle of three measurements is recorded instead.
+    """
+    name = request.node.name
+
+    async def run(
+        fn: Callable[[], Awaitable],
+        setup: Optional[Callable[[], Awaitable]] = None,
+        rounds: int = 200,
+        warmup: int = 5,
+        number: int = 1,
+    ):
+        assert number == 1 or setup is None, "setup runs once per sample, so it can't be combined with number"
+        if SAVE:
+            # The baseline is the middle of three measurements, so one noisy run doesn't set it
+            results = sorted([await _measure(fn, setup, rounds, warmup, number) for _ in range(3)], key=lambda r: r["relative"])
+            _results[name] = results[1]
+            return results[1]
+
+        baseline = _baseline().get(name)
+        for attempt in range(ATTEMPTS):
+            result = await _measure(fn, setup, rounds, warmup, number)
+            if baseline:
+                result["change"] = result["relative"] / baseline - 1
+                if result["change"] <= THRESHOLD:
+                    break
+        _results[name] = result
+
+        if baseline:
+            assert result["change"] <= THRESHOLD, (
+                f"{name} regressed {result['change']:.0%} against the baseline "
+                f"(p25 {result['p25'] * 1e6:.0f}µs, threshold {THRESHOLD:.0%})"
+            )
+        return result
+
+    return run
+
+def _baseline() -> Dict[str, float]:
+    return json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+
+def pytest_sessionfinish(session, exitstatus):
+    if SAVE and _results:
+        baseline = _baseline()
+        baseline.update({name: round(result["relative"], 4) for name, result in _results.items()})
+        BASELINE.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'name':<48} {'p25':>10} {'median':>10} {'p95':>10} {'vs baseline':>12}")
+    for name, result in sorted(_results.items()):
+        change = f"{result['change']:+.0%}" if "change" in result else "-"
+        terminalreporter.write_line(
+            f"{name:<48} {result['p25'] * 1e6:>8.0f}µs {result['median'] * 1e6:>8.0f}µs {result['p95'] * 1e6:>8.0f}µs {change:>12}"
+        )
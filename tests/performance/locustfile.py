@@ -1,40 +1,134 @@
-from locust import HttpUser, task, between
+"""
+Load-test scenarios. Seed first (scripts/seed_data.py or scripts/mass_seed.py) to export the
+credential pool, then run a scenario by class name, for example:
 
-class UniversityStudentUser(HttpUser):
-    wait_time = between(1, 4)
+    locust -f tests/performance/locustfile.py --host http://localhost:8000 WarmCacheStudent
+
+or headless with percentile reports through scripts/load_test.py.
+"""
+import csv
+import itertools
+import os
+import uuid
+from locust import HttpUser, task, between, constant
+
+CREDENTIALS_PATH = os.getenv("CREDENTIALS_PATH", os.path.join(os.path.dirname(__file__), "credentials.csv"))
+
+def load_credentials(path: str = CREDENTIALS_PATH) -> list:
+    if not os.path.exists(path):
+        return [("student1", "password123")]
+    with open(path, newline="") as f:
+        return [(row["username"], row["password"]) for row in csv.DictReader(f)]
+
+CREDENTIALS = load_credentials()
+
+# Simulated users take identities in turn, so N users hit N different students' cache keys.
+# With distributed workers each worker starts at its own offset in the pool.
+_next_identity = itertools.count()
+
+def claim_identity(environment) -> tuple:
+    worker = getattr(environment.runner, "worker_index", 0) or 0
+    return CREDENTIALS[(next(_next_identity) + worker * 7919) % len(CREDENTIALS)]
+
+class StudentUser(HttpUser):
+    abstract = True
     token = None
 
     def on_start(self):
-        response = self.client.post("/api/v1/login/access-token", data={
-            "username": "student1",
-            "password": "password123"
-        })
-        if response.status_code == 200:
-            self.token = response.json().get("access_token")
+        self.login(*claim_identity(self.environment))
+
+    def login(self, username: str, password: str) -> bool:
+        self.username = username
+        response = self.client.post(
+            "/api/v1/login/access-token", data={"username": username, "password": password}, name="Login"
+        )
+        self.token = response.json().get("access_token") if response.status_code == 200 else None
+        return self.token is not None
 
     @property
     def headers(self):
         return {"Authorization": f"Bearer {self.token}"} if self.token else {}
 
+    def read(self, path: str, name: str):
+        if self.token:
+            self.client.get(f"/api/v1{path}", headers=self.headers, name=name)
+
+class WarmCacheStudent(StudentUser):
+    """
+    One student per simulated user, browsing repeatedly: after the first round every read is
+    served from the cache.
+    """
+    wait_time = between(1, 4)
+
     @task(3)
     def view_subjects(self):
-        if not self.token:
-            return
-        self.client.get("/api/v1/academic/subjects", headers=self.headers, name="Get Subjects")
+        self.read("/academic/subjects", "Get Subjects")
 
     @task(3)
     def view_grades(self):
-        if not self.token:
-            return
-        self.client.get("/api/v1/academic/grades", headers=self.headers, name="Get Grades")
-    
+        self.read("/academic/grades", "Get Grades")
+
     @task(3)
     def view_schedule(self):
-        if not self.token:
-            return
-        self.client.get("/api/v1/academic/schedule", headers=self.headers, name="Get Schedule")
-            
+        self.read("/academic/schedule", "Get Schedule")
+
+    @task(2)
+    def view_overview(self):
+        self.read("/academic/overview", "Get Overview")
+
+    @task(1)
+    def view_summary(self):
+        self.read("/academic/summary", "Get Summary")
+
     @task(1)
     def get_profile(self):
-        if self.token:
-            self.client.get("/api/v1/users/me", headers=self.headers, name="Get Profile")
+        self.read("/users/me", "Get Profile")
+
+class ColdCacheStudent(StudentUser):
+    """
+    Every iteration moves to the next student in the pool and reads each page once, so reads
+    miss the cache and go to Postgres. Run it with a pool larger than users × iterations.
+    """
+    wait_time = between(1, 2)
+
+    def on_start(self):
+        pass
+
+    @task
+    def first_visit(self):
+        if not self.login(*claim_identity(self.environment)):
+            return
+        self.read("/academic/overview", "Cold Overview")
+        self.read("/academic/summary", "Cold Summary")
+        self.read("/academic/grades/history", "Cold Grade History")
+        self.read("/users/me", "Cold Profile")
+
+class LoginStorm(StudentUser):
+    """
+    Logins only, back to back, across the pool: measures password hashing under load.
+    """
+    wait_time = constant(0)
+
+    def on_start(self):
+        pass
+
+    @task
+    def login_next(self):
+        self.login(*claim_identity(self.environment))
+
+class ProfileUpdater(StudentUser):
+    """
+    Updates the profile, which invalidates the student's cached identity, then reads it back.
+    """
+    wait_time = between(2, 5)
+
+    @task
+    def update_profile(self):
+        if not self.token:
+            return
+        self.client.patch(
+            "/api/v1/users/me", json={"full_name": f"Load Test {uuid.uuid4().hex[:8]}"},
+            headers=self.headers, name="Update Profile"
+        )
+        self.read("/users/me", "Get Profile After Update")
+        self.read("/academic/overview", "Get Overview After Update")
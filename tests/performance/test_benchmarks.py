@@ -0,0 +1,132 @@
+import uuid
+from datetime import datetime, time, timedelta
+import orjson
+import pytest
+from app.api.deps import decode_token, get_current_principal, get_current_user
+from app.core import security
+from app.core.cache import cache
+from app.core.hashing import hashing_pool
+from app.models.user import User, Role
+from app.models.academic import Subject, Grade, Schedule
+from app.services.academic_service import academic_service
+from app.services.auth_service import auth_service
+from app.services.user_service import user_service
+
+PASSWORD = "bench_password"
+
+async def cold_cache():
+    """
+    Setup for cold-state rounds: empty Redis and this worker's L1.
+    """
+    await cache.client.flushall()
+    cache.local.clear()
+
+def rounds_for(state: str) -> dict:
+    """
+    bench() arguments per cache state: a cold round is one call on an empty cache; a warm call
+    takes microseconds, so warm rounds time 100 calls each.
+    """
+    if state == "cold":
+        return {"setup": cold_cache}
+    return {"number": 100, "rounds": 300}
+
+@pytest.fixture
+async def student(db_session):
+    """
+    A student with 6 subjects, 8 grades per subject and two classes a week for each.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    user = User(
+        email=f"bench{suffix}@ufro.cl",
+        username=f"bench{suffix}",
+        full_name="Bench Student",
+        hashed_password=security.get_password_hash(PASSWORD),
+        role=Role.STUDENT,
+    )
+    db_session.add(user)
+    for n in range(6):
+        subject = Subject(code=f"B{suffix}{n}", name=f"Bench Subject {n}", credits=n % 4 + 2)
+        db_session.add(subject)
+        for day in ("Monday", "Thursday"):
+            db_session.add(Schedule(
+                subject_id=subject.id, day=day, start_time=time(8 + n, 30), end_time=time(9 + n, 30), classroom="A-101"
+            ))
+        for e in range(8):
+            db_session.add(Grade(
+                student_id=user.id, subject_id=subject.id, value=4.0 + e * 0.3, weight=0.125,
+                evaluation_name=f"Evaluation {e}", evaluation_date=datetime(2025, 3, 1) + timedelta(days=7 * e),
+            ))
+    await db_session.commit()
+    return user
+
+@pytest.fixture
+def token(student):
+    return security.create_access_token(
+        student.id, claims={"role": student.role.value, "active": True, "ver": student.token_version}
+    )
+
+async def test_cache_get_l1(bench):
+    await cache.set("bench:key", {"id": 1, "name": "cached"})
+    await cache.get("bench:key")
+    await bench(lambda: cache.get("bench:key"), rounds=300, number=1000)
+
+async def test_cache_get_l2(bench):
+    await cache.set("bench:key", {"id": 1, "name": "cached"})
+
+    async def drop_l1():
+        cache.local.clear()
+    await bench(lambda: cache.get("bench:key"), setup=drop_l1, rounds=500)
+
+async def test_cache_get_or_set_miss(bench):
+    async def load():
+        return {"id": 1, "name": "loaded"}
+    await bench(lambda: cache.get_or_set("bench:key", load), setup=cold_cache, rounds=500)
+
+@pytest.mark.parametrize("state", ["cold", "warm"])
+async def test_academic_overview(bench, db_session, student, state):
+    await bench(
+        lambda: academic_service.get_student_overview(db_session, student.id),
+        **rounds_for(state),
+    )
+
+@pytest.mark.parametrize("state", ["cold", "warm"])
+async def test_academic_summary(bench, db_session, student, state):
+    await bench(
+        lambda: academic_service.get_student_summary(db_session, student.id),
+        **rounds_for(state),
+    )
+
+@pytest.mark.parametrize("state", ["cold", "warm"])
+async def test_academic_grade_page(bench, db_session, student, state):
+    page = orjson.loads(await academic_service.get_student_grade_page(db_session, student.id, limit=10))
+    await bench(
+        lambda: academic_service.get_student_grade_page(db_session, student.id, page["next_cursor"], limit=10),
+        **rounds_for(state),
+    )
+
+@pytest.mark.parametrize("state", ["cold", "warm"])
+async def test_user_get_by_id(bench, db_session, student, state):
+    await bench(
+        lambda: user_service.get_by_id(db_session, student.id),
+        **rounds_for(state),
+    )
+
+async def test_user_get_profile_warm(bench, db_session, student):
+    await bench(lambda: user_service.get_profile(db_session, student.id), **rounds_for("warm"))
+
+@pytest.mark.parametrize("state", ["cold", "warm"])
+async def test_get_current_user(bench, db_session, token, state):
+    await bench(
+        lambda: get_current_user(db_session, decode_token(token)),
+        **rounds_for(state),
+    )
+
+async def test_get_current_principal_warm(bench, db_session, token):
+    await bench(lambda: get_current_principal(db_session, decode_token(token)), **rounds_for("warm"))
+
+async def test_auth_login(bench, db_session, student):
+    # Dominated by argon2 in the hashing pool; guards against costlier hash parameters
+    try:
+        await bench(lambda: auth_service.login(db_session, student.username, PASSWORD), rounds=10, warmup=2)
+    finally:
+        hashing_pool.shutdown()